@@ -0,0 +1,326 @@
+"""
+API 的异步（ASGI）生产部署入口: python asgi_app.py  或  uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+
+back-flask.py 的开发服务器中每个请求占用一个线程和一个 pymysql 连接，几个全表范围的 /api/coordinates_in_area
+慢查询就能占满连接池，按日期的廉价查询只能排队。本入口：
+    - 整日期的 /api/coordinates 和 /api/coordinates_in_area 在 asyncio 上用 aiomysql 连接池查询，等待数据库时不占线程；
+    - WKT 解析、相交判断、结果组装和序列化放到有界线程池执行（shapely 的批量函数会释放 GIL）；
+    - 日期查询和区域查询各有独立的并发上限和连接池，区域查询排满时快速返回 503，不会拖住日期查询；
+    - 每个请求有总超时（504），SQL 另带 MAX_EXECUTION_TIME 提示，超时后数据库端同时终止查询；
+    - 其余请求（分页、二进制、流式、简化级别、瓦片、缓存失效、/metrics）交给原 Flask 应用在线程中处理，
+      与异步接口共享响应缓存、内存索引和指标。
+"""
+import asyncio
+import importlib.util
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import aiomysql
+import shapely
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from binary_format import MIMETYPE as BINARY_MIMETYPE
+
+from geo_decode import AREA_FIELDS, area_records, assemble_date_result, decode_wkt
+from metrics import StageTimer, activate
+
+
+def _load_api():
+    """
+    导入文件名带连字符的 back-flask.py，复用其中的配置、查询构造、缓存和指标。
+    """
+    spec = importlib.util.spec_from_file_location(
+        'back_flask', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'back-flask.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+api = _load_api()
+
+# 异步服务配置
+serving_config = {
+    'host': '0.0.0.0',
+    'port': 5000,
+    'date_concurrency': 32,  # 同时处理的日期查询数
+    'area_concurrency': 4,  # 同时处理的区域查询数，应小于 area_pool_size，为其他区域请求保留连接
+    'date_pool_size': 10,  # 日期查询的 aiomysql 连接数
+    'area_pool_size': 4,  # 区域查询的 aiomysql 连接数
+    'queue_timeout': 5,  # 等待并发名额的最长时间（秒），超时返回 503
+    'request_timeout': 60,  # 单个请求的总超时（秒），超时返回 504 并终止数据库端查询
+    'cpu_workers': max(2, os.cpu_count() or 1),  # 几何解析和序列化线程数
+    'wsgi_workers': 16  # 转交给 Flask 应用的请求线程数
+}
+
+# 两类异步查询的并发上限，asyncio 对象在服务启动时按事件循环创建
+_limits = {}
+# aiomysql 连接池：日期查询和区域查询分开，慢查询无法占满日期查询的连接
+_pools = {}
+# CPU 密集步骤的线程池
+_cpu_executor = ThreadPoolExecutor(max_workers=serving_config['cpu_workers'], thread_name_prefix='geometry')
+
+
+class ServerBusy(Exception):
+    """
+    等待并发名额超时。
+    """
+
+
+async def run_cpu(timer, func, *args):
+    """
+    在线程池中执行 CPU 密集步骤；timer 在该线程内绑定，decode 等阶段照常计入当前请求。
+    """
+    def call():
+        activate(timer)
+        try:
+            return func(*args)
+        finally:
+            activate(None)
+    return await asyncio.get_running_loop().run_in_executor(_cpu_executor, call)
+
+
+def with_time_limit(query):
+    """
+    为 SELECT 加上 MAX_EXECUTION_TIME 优化器提示，数据库端在请求超时后同时放弃查询。
+    """
+    milliseconds = int(serving_config['request_timeout'] * 1000)
+    return query.replace('SELECT', f"SELECT /*+ MAX_EXECUTION_TIME({milliseconds}) */", 1)
+
+
+async def fetch_all(kind, query, params, timer):
+    """
+    在 kind 对应的连接池上执行查询并返回全部行（字典）。
+    请求被取消（超时）时关闭该连接，半读的连接不会回到池中。
+    """
+    started = time.perf_counter()
+    async with _pools[kind].acquire() as connection:
+        timer.add('pool_wait', time.perf_counter() - started)
+        try:
+            with timer.stage('sql'):
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(with_time_limit(query), params)
+                    return await cursor.fetchall()
+        except asyncio.CancelledError:
+            connection.close()
+            raise
+
+
+async def limited(kind, handler, *args):
+    """
+    在 kind 的并发名额和请求总超时内执行 handler。
+    """
+    semaphore = _limits[kind]
+    try:
+        await asyncio.wait_for(semaphore.acquire(), serving_config['queue_timeout'])
+    except asyncio.TimeoutError:
+        raise ServerBusy(f"{kind} 查询排队超过 {serving_config['queue_timeout']}s")
+    try:
+        return await asyncio.wait_for(handler(*args), serving_config['request_timeout'])
+    finally:
+        semaphore.release()
+
+
+def error_response(status, message):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def handle(kind, endpoint, handler, *args):
+    """
+    执行查询并把异常映射为与 Flask 版本一致的错误响应，同时记录请求指标。
+    """
+    started = time.perf_counter()
+    timer = StageTimer()
+    try:
+        response = await limited(kind, handler, timer, *args)
+    except ServerBusy as e:
+        print("Busy:", e)
+        response = error_response(503, "Server busy, please retry")
+    except asyncio.TimeoutError:
+        print(f"Timeout: {endpoint} 超过 {serving_config['request_timeout']}s")
+        response = error_response(504, "Request timed out")
+    except aiomysql.MySQLError as e:
+        print("MySQL Error:", e)
+        response = error_response(500, "Database query failed")
+    except Exception as e:
+        print("General Error:", e)
+        response = error_response(500, f"An error occurred: {e}")
+
+    elapsed = time.perf_counter() - started
+    api.request_seconds.observe(elapsed, endpoint=endpoint, status=response.status_code)
+    timer.observe(api.request_stage_seconds, endpoint=endpoint)
+    api.response_bytes.observe(len(response.body), endpoint=endpoint)
+    return response
+
+
+def cached_response(body, etag, request):
+    """
+    与 Flask 版本相同的强 ETag 响应；If-None-Match 命中时返回 304。
+    """
+    headers = {
+        'ETag': f'"{etag}"', 'Cache-Control': api.response_cache_config['cache_control'], 'Vary': 'Accept'
+    }
+    if request.headers.get('if-none-match', '').strip() in (f'"{etag}"', f'W/"{etag}"', '*'):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+def encode_json(data, timer):
+    with timer.stage('serialize'):
+        return api.app.json.dumps(data).encode('utf-8')
+
+
+async def query_date(timer, date, request):
+    """
+    整日期的 /api/coordinates：先查响应缓存，未命中时异步读库，再在线程池中解析和序列化。
+    """
+    cached = api.response_cache.get(date, '')
+    if cached is None:
+        generation = api.response_cache.generation(date)
+        if api.memory_index_config['enabled']:
+            # 内存索引未命中时用同步连接池加载，放到线程池中执行
+            entry = await run_cpu(timer, api.polygon_index.get, 'greenland6', date)
+            rows, geoms = entry.rows, entry.geoms
+        else:
+            results = await fetch_all('date', api.date_queries['greenland6'], (date,), timer)
+            rows, geoms = await run_cpu(timer, decode_wkt, results, 'Location_WKT')
+
+        def assemble():
+            return encode_json(assemble_date_result(rows, geoms, None), timer)
+        body = await run_cpu(timer, assemble)
+        cached = api.response_cache.put(date, '', body, generation)
+    return cached_response(*cached, request)
+
+
+async def query_area(timer, query_polygon, date, start_date, end_date):
+    """
+    非分页的 /api/coordinates_in_area：MBR 候选集异步读库，精确相交判断和组装放到线程池。
+    """
+    if api.memory_index_config['enabled']:
+        data = await run_cpu(timer, api.query_area_from_index, query_polygon, date, start_date, end_date)
+        return Response(await run_cpu(timer, encode_json, data, timer), media_type='application/json')
+
+    query, params = api.build_polygon_query(
+        'greenland', AREA_FIELDS, date, start_date, end_date, area_wkt=query_polygon.wkt
+    )
+    results = await fetch_all('area', query, params, timer)
+
+    def filter_and_encode():
+        shapely.prepare(query_polygon)
+        rows, geoms = decode_wkt(results, 'Location')
+        mask = shapely.intersects(geoms, query_polygon)
+        return encode_json(area_records([row for row, hit in zip(rows, mask) if hit], geoms[mask]), timer)
+    return Response(await run_cpu(timer, filter_and_encode), media_type='application/json')
+
+
+# 转交 Flask 应用处理的其余请求
+flask_app = WSGIMiddleware(api.app, workers=serving_config['wsgi_workers'])
+
+
+def wants_plain_json(request):
+    """
+    与 Flask 版本的 get_stream_mode / get_binary_precision 使用同样的 Accept 协商，
+    协商结果为 NDJSON 或二进制格式时返回 False，这些请求交给 Flask。
+    """
+    accept = parse_accept_header(request.headers.get('accept'), MIMEAccept)
+    best = accept.best_match(['application/json', 'application/x-ndjson', BINARY_MIMETYPE])
+    return best not in ('application/x-ndjson', BINARY_MIMETYPE)
+
+
+class FastPath:
+    """
+    只有参数完全落在 params 内、且协商结果为普通 JSON 的请求走异步实现，其余转交 Flask，保证两种部署方式的接口行为一致。
+    """
+
+    def __init__(self, params, endpoint):
+        self.params = set(params)
+        self.endpoint = endpoint
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        if request.method != 'GET' or not set(request.query_params) <= self.params or not wants_plain_json(request):
+            await flask_app(scope, receive, send)
+            return
+        response = await self.endpoint(request)
+        # 与 Flask 版本一致，错误响应也带 Vary: Accept
+        response.headers['Vary'] = 'Accept'
+        await response(scope, receive, send)
+
+
+async def coordinates_endpoint(request):
+    date = request.query_params.get('Date')
+    if not date:
+        return error_response(400, "Missing required parameter: Date")
+    try:
+        date = api.parse_date(date)
+    except ValueError as e:
+        return error_response(400, f"Invalid Date parameter: {e}")
+    return await handle('date', 'get_coordinates', query_date, date, request)
+
+
+async def coordinates_in_area_endpoint(request):
+    area = request.query_params.get('Area')
+    if not area:
+        return error_response(400, "Missing required parameter: Area")
+    try:
+        query_polygon = api.parse_area(area)
+    except ValueError as e:
+        return error_response(400, str(e))
+    try:
+        dates = [
+            api.parse_date(request.query_params[name]) if request.query_params.get(name) else None
+            for name in ('Date', 'StartDate', 'EndDate')
+        ]
+    except ValueError as e:
+        return error_response(400, f"Invalid date parameter: {e}")
+    return await handle('area', 'get_coordinates_in_area', query_area, query_polygon, *dates)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    db_config = api.db_config
+    for kind in ('date', 'area'):
+        _limits[kind] = asyncio.Semaphore(serving_config[f'{kind}_concurrency'])
+        _pools[kind] = await aiomysql.create_pool(
+            minsize=1, maxsize=serving_config[f'{kind}_pool_size'], pool_recycle=api.pool_config['max_idle'],
+            host=db_config['host'], port=db_config.get('port', 3306), user=db_config['user'],
+            password=db_config['password'], db=db_config['database'], charset='utf8mb4', autocommit=True
+        )
+    print(f"异步服务已启动: 日期查询并发 {serving_config['date_concurrency']}, "
+          f"区域查询并发 {serving_config['area_concurrency']}, 请求超时 {serving_config['request_timeout']}s")
+    try:
+        yield
+    finally:
+        for pool in _pools.values():
+            pool.close()
+            await pool.wait_closed()
+        _pools.clear()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/coordinates', FastPath({'Date'}, coordinates_endpoint)),
+        Route('/api/coordinates_in_area', FastPath({'Area', 'Date', 'StartDate', 'EndDate'}, coordinates_in_area_endpoint)),
+        Mount('/', app=flask_app)
+    ],
+    # 与 back-flask.py 中 CORS(app) 的默认策略一致：允许任意来源、方法和请求头，不携带凭据；
+    # 快速路径的响应和预检请求不经过 Flask，需要在这里统一处理
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host=serving_config['host'], port=serving_config['port'])
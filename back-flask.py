@@ -1,10 +1,31 @@
+import ast
+import datetime
+import math
+import os
+import threading
+import time
+from itertools import chain
+
+import numpy as np
 import pymysql
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from shapely import wkt
-from shapely.errors import GEOSException
+import shapely
 from shapely.geometry import Polygon
-from shapely.wkt import loads
+
+from binary_format import MIMETYPE as BINARY_MIMETYPE
+from binary_format import encode_polygons
+from change_detection import change_config
+from db_pool import ConnectionPool, PoolTimeout
+from geo_decode import (AREA_FIELDS, DATE_FIELDS, area_records, assemble_date_result, date_records, decode_wkt,
+                        extreme_indices, simplify_geoms, tolerance_level, zoom_level)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from metrics import (BYTE_BUCKETS, Gauge, Histogram, SlowRequestProfiler, StageTimer, TimedDictCursor, activate,
+                     add_stage, render_metrics, stage)
+from polygon_index import PolygonIndexCache
+from response_cache import ResponseCache
+from vector_tiles import (TILE_BUFFER, TILE_EXTENT, mapbox_vector_tile, render_tile, tile_bounds_lonlat,
+                          tiles_covering)
 
 app = Flask(__name__)
 CORS(app)
@@ -15,9 +36,356 @@ db_config = {
     'user': 'root',
     'password': '0601',
     'database': 'yaogan',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': TimedDictCursor  # 即 DictCursor，另把 SQL 耗时计入当前请求的 sql 阶段
+}
+
+# 连接池配置
+pool_config = {
+    'max_size': 10,  # 最大连接数
+    'max_idle': 300,  # 连接最大空闲时间（秒）
+    'checkout_timeout': 10,  # 等待空闲连接的最长时间（秒）
+    'ping_interval': 5  # 空闲超过该时间的连接取出时先 ping
+}
+
+# 所有路由共享的连接池
+db_pool = ConnectionPool(db_config, **pool_config)
+
+
+# 请求指标配置
+metrics_config = {
+    'profile_sample_rate': 0.0,  # 按该比例对请求启用 cProfile，0 表示关闭
+    'slow_request_seconds': 1.0,  # 被采样且耗时不低于该值的请求写出 profile
+    'profile_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'profiles')  # profile 输出目录
 }
 
+# 每个请求的总耗时、各阶段耗时（pool_wait / sql / decode / serialize）和响应字节数，通过 /metrics 导出
+request_seconds = Histogram('yaogan_api_request_seconds', 'API 请求总耗时（秒）', ('endpoint', 'status'))
+request_stage_seconds = Histogram('yaogan_api_stage_seconds', 'API 请求各阶段耗时（秒）', ('endpoint', 'stage'))
+response_bytes = Histogram('yaogan_api_response_bytes', 'API 响应大小（字节）', ('endpoint',), buckets=BYTE_BUCKETS)
+
+request_profiler = SlowRequestProfiler(
+    metrics_config['profile_sample_rate'], metrics_config['slow_request_seconds'], metrics_config['profile_dir']
+)
+
+# 取连接的耗时计入当前请求的 pool_wait 阶段
+db_pool.on_acquire = lambda seconds: add_stage('pool_wait', seconds)
+
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_timer = StageTimer()
+    activate(g.metrics_timer)
+    g.metrics_profile = request_profiler.start()
+    g.metrics_started = time.perf_counter()
+
+
+def count_streamed_bytes(chunks, endpoint, timer):
+    """
+    流式响应的大小和查询、解码耗时在输出完毕后才知道，边输出边计数，结束时记入指标。
+    服务器可能在其他线程中迭代响应（如 ASGI 部署），每次取下一块时重新绑定计时器。
+    """
+    total = 0
+    chunks = iter(chunks)
+    try:
+        while True:
+            activate(timer)
+            try:
+                chunk = next(chunks, None)
+            finally:
+                activate(None)
+            if chunk is None:
+                break
+            total += len(chunk)
+            yield chunk
+    finally:
+        response_bytes.observe(total, endpoint=endpoint)
+        timer.observe(request_stage_seconds, endpoint=endpoint)
+
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.metrics_started
+    endpoint = request.endpoint or 'unknown'
+    request_seconds.observe(elapsed, endpoint=endpoint, status=response.status_code)
+    if response.is_streamed:
+        response.response = count_streamed_bytes(response.response, endpoint, g.metrics_timer)
+    else:
+        g.metrics_timer.observe(request_stage_seconds, endpoint=endpoint)
+        response_bytes.observe(response.content_length or 0, endpoint=endpoint)
+    request_profiler.finish(g.pop('metrics_profile', None), elapsed, endpoint)
+    return response
+
+
+@app.teardown_request
+def stop_request_metrics(exc):
+    # 请求出错时 after_request 不会执行，在这里停止采样并解除计时器绑定
+    profile = g.pop('metrics_profile', None)
+    if profile is not None:
+        profile.disable()
+    activate(None)
+
+
+# 各表按日期加载记录的查询语句
+date_queries = {
+    'greenland6': """
+        SELECT 
+            ID, 
+            Date, 
+            Area, 
+            ST_AsText(Location) AS Location_WKT, 
+            ST_AsText(Center) AS Center_WKT, 
+            Ratios,
+            Trans  -- Trans 是面积变化
+        FROM greenland6
+        WHERE Date = %s
+    """,
+    'greenland': "SELECT ID, Date, Area, ST_AsText(Location) AS Location FROM greenland WHERE Date = %s"
+}
+
+# 变化检测任务（change_detection.py）维护的每日汇总，记录面积变化最大/最小的多边形 ID
+summary_query = f"SELECT MaxIncreaseID, MaxDecreaseID FROM {change_config['summary']} WHERE Date = %s"
+
+
+def load_date_rows(table, date):
+    """
+    从数据库读取某个表中指定日期的全部记录。
+    """
+    with db_pool.connection() as connection, connection.cursor() as cursor:
+        cursor.execute(date_queries[table], (date,))
+        return list(cursor.fetchall())
+
+
+def list_dates(table, start_date=None, end_date=None):
+    """
+    列出表中（可选日期范围内）的所有日期。
+    """
+    query = f"SELECT DISTINCT Date FROM {table} WHERE 1 = 1"
+    params = []
+    if start_date:
+        query += " AND Date >= %s"
+        params.append(start_date)
+    if end_date:
+        query += " AND Date <= %s"
+        params.append(end_date)
+    with db_pool.connection() as connection, connection.cursor() as cursor:
+        cursor.execute(query + " ORDER BY Date", params)
+        return [row['Date'] for row in cursor.fetchall()]
+
+
+# 各表输出字段对应的 SQL 列
+polygon_columns = {
+    'greenland6': {
+        'ID': 'ID',
+        'Date': 'Date',
+        'Area': 'Area',
+        'Coordinates': 'ST_AsText(Location) AS Location_WKT',
+        'Change': 'Trans',
+        'Center': 'ST_AsText(Center) AS Center_WKT',
+        'Ratios': 'Ratios'
+    },
+    'greenland': {
+        'ID': 'ID',
+        'Date': 'Date',
+        'Area': 'Area',
+        'Coordinates': 'ST_AsText(Location) AS Location'
+    }
+}
+
+# 各表 WKT 结果列名
+wkt_fields = {'greenland6': 'Location_WKT', 'greenland': 'Location'}
+
+
+def build_polygon_query(table, fields, date=None, start_date=None, end_date=None,
+                        area_wkt=None, bbox=None, after=None, limit=None):
+    """
+    构造多边形查询 SQL，字段选择、空间过滤和分页都下推到数据库。
+
+    - area_wkt / bbox: 用 MBRIntersects 走 Location 上的空间索引，坐标顺序与表中存储的一致（SRID 4326）
+    - after / limit: 按 ID 的键集分页
+    """
+    columns = polygon_columns[table]
+    select = ['ID'] + [columns[field] for field in fields if field != 'ID']
+    # 区域查询需要 WKT 做精确相交判断；greenland6 流式输出需要 Trans 统计极值
+    if area_wkt and 'Coordinates' not in fields:
+        select.append(columns['Coordinates'])
+    if table == 'greenland6' and 'Change' not in fields:
+        select.append('Trans')
+
+    conditions = []
+    params = []
+    if area_wkt:
+        conditions.append("MBRIntersects(Location, ST_GeomFromText(%s, 4326))")
+        params.append(area_wkt)
+    if bbox:
+        conditions.append("MBRIntersects(Location, ST_GeomFromText(%s, 4326))")
+        params.append(shapely.box(*bbox).wkt)
+
+    # 可选的日期 / 日期范围过滤（走 Date 索引）
+    if date:
+        conditions.append("Date = %s")
+        params.append(date)
+    if start_date:
+        conditions.append("Date >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("Date <= %s")
+        params.append(end_date)
+    if after is not None:
+        conditions.append("ID > %s")
+        params.append(after)
+
+    query = f"SELECT {', '.join(select)} FROM {table}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if after is not None or limit:
+        query += " ORDER BY ID"
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+# 分页配置
+page_config = {
+    'max_limit': 5000  # 单页最多返回的记录数
+}
+
+
+def parse_date(value):
+    """
+    把日期参数规范化为 YYYY-MM-DD，同一日期的不同写法共用查询和缓存键；格式不合法时抛出 ValueError。
+    """
+    return datetime.date.fromisoformat(value).isoformat()
+
+
+def parse_date_args(*names):
+    """
+    按顺序解析可选的日期参数，未传的参数为 None。
+    """
+    return [parse_date(request.args[name]) if request.args.get(name) else None for name in names]
+
+
+def parse_page_args(allowed_fields):
+    """
+    解析分页参数 limit / after（上一页返回的 next_cursor）、视口过滤 bbox=minx,miny,maxx,maxy
+    和字段选择 fields=ID,Area,...，参数不合法时抛出 ValueError。
+    bbox 的坐标顺序与返回的 Coordinates 一致。
+    """
+    page = {'limit': None, 'after': None, 'bbox': None, 'fields': None}
+
+    limit = request.args.get('limit')
+    if limit:
+        page['limit'] = int(limit)
+        if not 0 < page['limit'] <= page_config['max_limit']:
+            raise ValueError(f"limit must be between 1 and {page_config['max_limit']}")
+
+    after = request.args.get('after')
+    if after:
+        page['after'] = int(after)
+
+    bbox = request.args.get('bbox')
+    if bbox:
+        values = [float(v) for v in bbox.split(',')]
+        if len(values) != 4 or values[0] > values[2] or values[1] > values[3]:
+            raise ValueError("bbox must be minx,miny,maxx,maxy")
+        page['bbox'] = values
+
+    fields = request.args.get('fields')
+    if fields:
+        page['fields'] = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in page['fields'] if field not in allowed_fields]
+        if unknown or not page['fields']:
+            raise ValueError(f"fields must be a subset of {','.join(allowed_fields)}")
+
+    return page
+
+
+# 几何简化配置
+simplify_config = {
+    'max_zoom': 22  # zoom 参数上限，超过该级别不再简化
+}
+
+
+def parse_level_args():
+    """
+    解析几何简化参数：zoom（地图缩放级别）或 tolerance（简化容差，单位为度），都不传时返回 None。
+    """
+    zoom = request.args.get('zoom')
+    if zoom:
+        zoom = int(zoom)
+        if not 0 <= zoom <= simplify_config['max_zoom']:
+            raise ValueError(f"zoom must be between 0 and {simplify_config['max_zoom']}")
+        return zoom_level(zoom)
+
+    tolerance = request.args.get('tolerance')
+    if tolerance:
+        tolerance = float(tolerance)
+        if not 0 < tolerance < 1:
+            raise ValueError("tolerance must be between 0 and 1 degree")
+        return tolerance_level(tolerance)
+
+    return None
+
+
+def is_paged(page):
+    return any(value is not None for value in page.values())
+
+
+def page_variant(page):
+    """
+    分页参数的规范化字符串，作为响应缓存的变体键。
+    """
+    return '&'.join(f"{key}={value}" for key, value in sorted(page.items()) if value is not None)
+
+
+# 内存空间索引配置：开启后按日期把多边形加载进 STRtree，查询直接走内存
+memory_index_config = {
+    'enabled': False,
+    'memory_budget': 512 * 1024 * 1024  # 内存预算（字节），超出后按 LRU 淘汰
+}
+
+polygon_index = PolygonIndexCache(
+    load_date_rows,
+    memory_budget=memory_index_config['memory_budget'],
+    wkt_fields=wkt_fields
+)
+
+
+# /api/coordinates 响应缓存配置
+response_cache_config = {
+    'max_bytes': 256 * 1024 * 1024,  # 内存中缓存的最大字节数
+    'spill_dir': None,  # 磁盘溢出目录，None 表示不写磁盘
+    'cache_control': 'public, no-cache'  # 允许浏览器/CDN 缓存，但每次用 ETag 重新验证
+}
+
+response_cache = ResponseCache(
+    max_bytes=response_cache_config['max_bytes'],
+    spill_dir=response_cache_config['spill_dir']
+)
+
+
+# 流式输出配置
+stream_config = {
+    'chunk_size': 2000  # 服务端游标每批读取的行数
+}
+
+
+# 矢量瓦片配置
+tile_config = {
+    'max_zoom': 22,  # 支持的最大缩放级别
+    'max_bytes': 128 * 1024 * 1024,  # 内存中缓存的瓦片最大字节数
+    'spill_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tiles'),  # 瓦片磁盘缓存目录，启动时清空
+    'max_spill_bytes': 1024 * 1024 * 1024,  # 磁盘缓存的瓦片最大字节数
+    'seed_min_zoom': 8,  # 预生成瓦片的默认缩放级别范围
+    'seed_max_zoom': 14,
+    'seed_zoom_limit': 16  # 预生成允许的最大缩放级别，每增加一级瓦片数约翻四倍
+}
+
+# 瓦片缓存：内存 LRU，淘汰的瓦片写入磁盘
+tile_cache = ResponseCache(
+    max_bytes=tile_config['max_bytes'], spill_dir=tile_config['spill_dir'], max_spill_bytes=tile_config['max_spill_bytes']
+)
+
 
 # 定义一个根路径的路由
 @app.route('/')
@@ -60,89 +428,24 @@ def home():
 #     except Exception as e:
 #         print("General Error:", e)
 #         return {"error": f"An error occurred: {e}"}
-def query_coordinates_by_date(date):
-    try:
-        connection = pymysql.connect(**db_config)
-        cursor = connection.cursor()
-
-        # 查询greenland6表中指定日期的记录
-        query = """
-            SELECT 
-                ID, 
-                Date, 
-                Area, 
-                ST_AsText(Location) AS Location_WKT, 
-                ST_AsText(Center) AS Center_WKT, 
-                Ratios,
-                Trans  -- Trans 是面积变化
-            FROM greenland6
-            WHERE Date = %s
-        """
-        cursor.execute(query, (date,))
-
-        results = cursor.fetchall()
-
-        parsed_results = []
-        max_area_increase = float('-inf')  # 最大面积增加值
-        min_area_decrease = float('inf')  # 最大面积减少值
-        max_increase_record = None
-        max_decrease_record = None
-
-        # 解析查询结果
-        for row in results:
-            try:
-                # 将Location字段转换为Shapely对象
-                location_polygon = wkt.loads(row['Location_WKT'])
-                parsed_results.append({
-                    'ID': row['ID'],
-                    'Date': row['Date'],
-                    'Area': row['Area'],
-                    'Coordinates': list(location_polygon.exterior.coords),
-                    'Change': row['Trans'],  # 使用Trans作为面积变化
-                    'Center': row['Center_WKT'],
-                    'Ratios': row['Ratios']
-                })
-
-                # 计算面积变化最大和最小的多边形
-                if row['Trans'] > max_area_increase:
-                    max_area_increase = row['Trans']
-                    max_increase_record = {
-                        'ID': row['ID'],
-                        'Date': row['Date'],
-                        'Area': row['Area'],
-                        'Coordinates': list(location_polygon.exterior.coords),
-                        'Change': row['Trans'],
-                        'Center': row['Center_WKT'],
-                        'Ratios': row['Ratios']
-                    }
-
-                if row['Trans'] < min_area_decrease:
-                    min_area_decrease = row['Trans']
-                    max_decrease_record = {
-                        'ID': row['ID'],
-                        'Date': row['Date'],
-                        'Area': row['Area'],
-                        'Coordinates': list(location_polygon.exterior.coords),
-                        'Change': row['Trans'],
-                        'Center': row['Center_WKT'],
-                        'Ratios': row['Ratios']
-                    }
-
-            except GEOSException as ge:
-                print(f"Invalid WKT format for ID {row['ID']}: {ge}")
-
-        cursor.close()
-        connection.close()
+def query_coordinates_by_date(date, level=None):
+    try:
+        if memory_index_config['enabled']:
+            # 从内存索引中读取该日期的记录（未命中时加载一次）
+            entry = polygon_index.get('greenland6', date)
+            rows, geoms = entry.rows, entry.geoms
+        else:
+            # 批量解析该日期所有多边形的 WKT
+            rows, geoms = decode_wkt(load_date_rows('greenland6', date), 'Location_WKT')
 
         # 返回所有记录并添加面积变化最大和最小的记录
-        result = {
-            'all_polygons': parsed_results,
-            'max_increase_record': max_increase_record,
-            'max_decrease_record': max_decrease_record
-        }
+        result = assemble_date_result(rows, geoms, level)
 
         return result
 
+    except PoolTimeout as e:
+        print("Pool Error:", e)
+        return {"error": "Database busy, please retry"}
     except pymysql.MySQLError as e:
         print("MySQL Error:", e)
         return {"error": "Database query failed"}
@@ -151,51 +454,430 @@ def query_coordinates_by_date(date):
         return {"error": f"An error occurred: {e}"}
 
 
+def get_stream_mode():
+    """
+    流式输出模式：?stream=json 输出分块 JSON，?stream=ndjson 或 Accept: application/x-ndjson 输出 NDJSON。
+    """
+    stream = request.args.get('stream', '').lower()
+    if stream in ('1', 'true', 'json'):
+        return 'json'
+    if stream == 'ndjson':
+        return 'ndjson'
+    if request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson':
+        return 'ndjson'
+    return None
+
+
+def stream_rows(query, params, chunk_size=None):
+    """
+    用服务端游标（SSDictCursor）分批读取结果，每次产出一批行，内存占用与结果总量无关。
+    """
+    chunk_size = chunk_size or stream_config['chunk_size']
+    # 连接在整个输出期间占用，不经过 db_pool.connection()，取连接耗时在这里记入 pool_wait
+    started = time.perf_counter()
+    connection = db_pool.acquire()
+    add_stage('pool_wait', time.perf_counter() - started)
+    finished = False
+    try:
+        with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+            with stage('sql'):
+                cursor.execute(query, params)
+            while True:
+                with stage('sql'):  # 服务端游标的结果在 fetchmany 时才从数据库读取
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finished = True
+    finally:
+        # 客户端中途断开时结果集没有读完，这条连接不能再复用，直接丢弃
+        db_pool.release(connection, broken=not finished)
+
+
+def stream_date_features(query, params, fields, mode, level=None):
+    """
+    逐批解码并输出某日期的多边形；面积变化最大/最小记录在流末尾输出。
+    """
+    dumps = app.json.dumps
+    max_record, max_value = None, None
+    min_record, min_value = None, None
+    first = True
+
+    # 先执行查询再输出开头，查询出错时还能返回 500
+    batches = stream_rows(query, params)
+    first_batch = next(batches, None)
+
+    if mode == 'json':
+        yield '{"all_polygons":['
+
+    for rows in chain([first_batch] if first_batch else [], batches):
+        geoms = None
+        if fields is None or 'Coordinates' in fields:
+            rows, geoms = decode_wkt(rows, 'Location_WKT')
+        records = date_records(rows, geoms, fields, level)
+        if not records:
+            continue
+
+        # 用本批的极值更新全局极值（并列时保留先出现的记录）
+        trans = [row['Trans'] for row in rows]
+        max_index, min_index = extreme_indices(trans)
+        if max_index is not None and (max_value is None or trans[max_index] > max_value):
+            max_record, max_value = records[max_index], trans[max_index]
+        if min_index is not None and (min_value is None or trans[min_index] < min_value):
+            min_record, min_value = records[min_index], trans[min_index]
+
+        if mode == 'json':
+            chunk = ','.join(dumps(record) for record in records)
+            yield chunk if first else ',' + chunk
+        else:
+            yield ''.join(dumps(record) + '\n' for record in records)
+        first = False
+
+    summary = {'max_increase_record': max_record, 'max_decrease_record': min_record}
+    if mode == 'json':
+        yield '],' + dumps(summary)[1:]
+    else:
+        yield dumps(summary) + '\n'
+
+
+def stream_area_features(query, params, query_polygon, fields, mode):
+    """
+    逐批读取区域查询的候选集，精确相交判断后立即输出。
+    """
+    dumps = app.json.dumps
+    shapely.prepare(query_polygon)
+    first = True
+
+    batches = stream_rows(query, params)
+    first_batch = next(batches, None)
+
+    if mode == 'json':
+        yield '['
+
+    for rows in chain([first_batch] if first_batch else [], batches):
+        rows, geoms = decode_wkt(rows, 'Location')
+        mask = shapely.intersects(geoms, query_polygon)
+        records = area_records([row for row, hit in zip(rows, mask) if hit], geoms[mask], fields)
+        if not records:
+            continue
+
+        if mode == 'json':
+            chunk = ','.join(dumps(record) for record in records)
+            yield chunk if first else ',' + chunk
+        else:
+            yield ''.join(dumps(record) + '\n' for record in records)
+        first = False
+
+    if mode == 'json':
+        yield ']'
+
+
+def make_stream_response(chunks, mode):
+    """
+    先取出第一块数据，连接池超时、SQL 错误等仍能以 500 返回；之后的错误只能中断输出。
+    """
+    try:
+        head = next(chunks)
+    except PoolTimeout as e:
+        print("Pool Error:", e)
+        return jsonify({"error": "Database busy, please retry"}), 500
+    except pymysql.MySQLError as e:
+        print("MySQL Error:", e)
+        return jsonify({"error": "Database query failed"}), 500
+
+    def generate():
+        yield head
+        try:
+            yield from chunks
+        except Exception as e:
+            # 响应头已经发出，只能记录错误并截断输出
+            print("Stream Error:", e)
+
+    mimetype = 'application/x-ndjson' if mode == 'ndjson' else 'application/json'
+    return app.response_class(stream_with_context(generate()), mimetype=mimetype)
+
+
 @app.route('/api/coordinates', methods=['GET'])
 def get_coordinates():
     date = request.args.get('Date')
     if not date:
         return jsonify({"error": "Missing required parameter: Date"}), 400
+    try:
+        date = parse_date(date)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid Date parameter: {e}"}), 400
 
-    data = query_coordinates_by_date(date)
-    if "error" in data:
-        return jsonify(data), 500
+    try:
+        page = parse_page_args(DATE_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid paging parameter: {e}"}), 400
 
-    return jsonify(data)
+    try:
+        level = parse_level_args()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid simplification parameter: {e}"}), 400
+
+    try:
+        coord_bytes = get_binary_precision()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid binary parameter: {e}"}), 400
 
+    # 二进制格式：列式数组 + 外环偏移 + 扁平坐标缓冲区
+    if coord_bytes:
+        variant = f"binary{coord_bytes * 8}|{page_variant(page)}"
+        if level is not None:
+            variant += f"|tolerance={level['tolerance']!r}"
+        cached = response_cache.get(date, variant)
+        if cached is None:
+            generation = response_cache.generation(date)
+            data = query_coordinates_binary(date, page, level, coord_bytes)
+            if isinstance(data, dict):
+                return jsonify(data), 500
+            cached = response_cache.put(date, variant, data, generation)
+        return make_cached_response(*cached, mimetype=BINARY_MIMETYPE)
 
-def query_coordinates_in_area(area_coords):
+    # 流式模式：直接从服务端游标边读边输出，不经过响应缓存
+    mode = get_stream_mode()
+    if mode:
+        query, params = build_polygon_query(
+            'greenland6', page['fields'] or DATE_FIELDS, date=date,
+            bbox=page['bbox'], after=page['after'], limit=page['limit']
+        )
+        return make_stream_response(stream_date_features(query, params, page['fields'], mode, level), mode)
+
+    # 先查响应缓存：历史日期入库后不再变化，直接返回序列化好的结果
+    # 每个 (日期, 分页参数, 简化级别) 组合单独缓存，简化只在第一次请求时计算
+    variant = page_variant(page)
+    if level is not None:
+        variant += f"|tolerance={level['tolerance']!r}"
+    cached = response_cache.get(date, variant)
+    if cached is None:
+        generation = response_cache.generation(date)
+        if is_paged(page):
+            data = query_coordinates_page(date, page, level)
+        else:
+            data = query_coordinates_by_date(date, level)
+        if "error" in data:
+            return jsonify(data), 500
+        with stage('serialize'):
+            body = app.json.dumps(data).encode('utf-8')
+        cached = response_cache.put(date, variant, body, generation)
+
+    return make_cached_response(*cached)
+
+
+def get_binary_precision():
+    """
+    ?format=binary 或 Accept: application/vnd.yaogan.polygons 时返回坐标字节数（precision=32 为 4，默认 8），
+    否则返回 None。
+    """
+    binary = (
+        request.args.get('format') == 'binary'
+        or request.accept_mimetypes.best_match(['application/json', BINARY_MIMETYPE]) == BINARY_MIMETYPE
+    )
+    if not binary:
+        return None
+
+    precision = request.args.get('precision', '64')
+    if precision not in ('32', '64'):
+        raise ValueError("precision must be 32 or 64")
+    return 4 if precision == '32' else 8
+
+
+def query_coordinates_binary(date, page, level, coord_bytes):
+    """
+    按二进制格式编码某日期的多边形（字段固定为全部字段，fields 参数不生效）。
+    分页时面积变化最大/最小下标只在本页内统计。
+    """
     try:
-        connection = pymysql.connect(**db_config)
-        cursor = connection.cursor()
+        next_cursor = None
+        if is_paged(page):
+            query, params = build_polygon_query(
+                'greenland6', DATE_FIELDS, date=date, bbox=page['bbox'], after=page['after'], limit=page['limit']
+            )
+            with db_pool.connection() as connection, connection.cursor() as cursor:
+                cursor.execute(query, params)
+                results = cursor.fetchall()
+            if page['limit'] and len(results) == page['limit']:
+                next_cursor = results[-1]['ID']
+            rows, geoms = decode_wkt(results, 'Location_WKT')
+        elif memory_index_config['enabled']:
+            entry = polygon_index.get('greenland6', date)
+            rows, geoms = entry.rows, entry.geoms
+        else:
+            rows, geoms = decode_wkt(load_date_rows('greenland6', date), 'Location_WKT')
 
-        # 查询所有记录
-        query = "SELECT ID, Date, Area, ST_AsText(Location) AS Location FROM greenland"
-        cursor.execute(query)
+        max_index, min_index = extreme_indices([row['Trans'] for row in rows])
+        simplified = simplify_geoms(geoms, level)
+        with stage('serialize'):
+            return b''.join(encode_polygons(rows, simplified, coord_bytes, max_index, min_index, next_cursor))
+    except PoolTimeout as e:
+        print("Pool Error:", e)
+        return {"error": "Database busy, please retry"}
+    except pymysql.MySQLError as e:
+        print("MySQL Error:", e)
+        return {"error": "Database query failed"}
+    except Exception as e:
+        print("General Error:", e)
+        return {"error": f"An error occurred: {e}"}
 
-        results = cursor.fetchall()
 
-        # 构造查询区域的 Polygon 对象
-        query_polygon = Polygon(area_coords)
+def query_coordinates_page(date, page, level=None):
+    """
+    分页 / 视口 / 字段裁剪版本的日期查询，全部条件下推到 SQL。
+    面积变化最大/最小记录仍按整个日期统计：优先按变化检测汇总表中记录的 ID 读取，
+    该日期尚未汇总时退回两条走 (Date, Trans) 索引的查询。
+    """
+    fields = page['fields'] or DATE_FIELDS
+    try:
+        query, params = build_polygon_query(
+            'greenland6', fields, date=date, bbox=page['bbox'], after=page['after'], limit=page['limit']
+        )
+        extreme_query, extreme_params = build_polygon_query('greenland6', fields, date=date)
 
-        filtered_results = []
-        for row in results:
-            try:
-                location_polygon = loads(row['Location'])
-                if location_polygon.intersects(query_polygon):
-                    filtered_results.append({
-                        'ID': row['ID'],
-                        'Date': row['Date'],
-                        'Area': row['Area'],
-                        'Coordinates': list(location_polygon.exterior.coords)
-                    })
-            except GEOSException as ge:
-                print(f"Invalid WKT format for ID {row['ID']}: {ge}")
-
-        cursor.close()
-        connection.close()
+        with db_pool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.execute(summary_query, (date,))
+            summary = cursor.fetchone()
+            if summary is not None:
+                max_rows, min_rows = [], []
+                for extreme_id, target in ((summary['MaxIncreaseID'], max_rows), (summary['MaxDecreaseID'], min_rows)):
+                    if extreme_id is not None:
+                        cursor.execute(extreme_query + " AND ID = %s", extreme_params + [extreme_id])
+                        target.extend(cursor.fetchall())
+            else:
+                extreme_query += " AND Trans IS NOT NULL ORDER BY Trans {}, ID LIMIT 1"
+                cursor.execute(extreme_query.format('DESC'), extreme_params)
+                max_rows = cursor.fetchall()
+                cursor.execute(extreme_query.format('ASC'), extreme_params)
+                min_rows = cursor.fetchall()
+
+        def to_records(result_rows):
+            geoms = None
+            if 'Coordinates' in fields:
+                result_rows, geoms = decode_wkt(result_rows, 'Location_WKT')
+            return date_records(result_rows, geoms, fields, level)
+
+        max_records = to_records(max_rows)
+        min_records = to_records(min_rows)
+        return {
+            'all_polygons': to_records(rows),
+            'max_increase_record': max_records[0] if max_records else None,
+            'max_decrease_record': min_records[0] if min_records else None,
+            # 本页已满时返回下一页游标，否则表示已经取完
+            'next_cursor': rows[-1]['ID'] if page['limit'] and len(rows) == page['limit'] else None
+        }
+    except PoolTimeout as e:
+        print("Pool Error:", e)
+        return {"error": "Database busy, please retry"}
+    except pymysql.MySQLError as e:
+        print("MySQL Error:", e)
+        return {"error": "Database query failed"}
+    except Exception as e:
+        print("General Error:", e)
+        return {"error": f"An error occurred: {e}"}
+
+
+def make_cached_response(body, etag, mimetype='application/json'):
+    """
+    带强 ETag 的响应；If-None-Match 命中时返回 304。
+    """
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = response_cache_config['cache_control']
+    return response.make_conditional(request)
+
+
+# 按 Accept 协商 JSON / NDJSON / 二进制格式的接口
+NEGOTIATED_ENDPOINTS = {'get_coordinates', 'get_coordinates_in_area'}
+
+
+@app.after_request
+def add_vary_accept(response):
+    """
+    同一 URL 按 Accept 返回不同格式，所有响应（含流式和错误响应）都要带 Vary: Accept，避免共享缓存混用。
+    """
+    if request.endpoint in NEGOTIATED_ENDPOINTS:
+        response.vary.add('Accept')
+    return response
+
+
+def parse_area(area):
+    """
+    把 Area 参数（坐标数组字面量）解析为查询多边形；格式不对或多边形无效（如自相交）时抛出 ValueError。
+    """
+    try:
+        query_polygon = Polygon(ast.literal_eval(area))
+    except (ValueError, SyntaxError, TypeError):
+        raise ValueError("Invalid Area format. It should be an array of coordinates.")
+    if query_polygon.is_empty or not query_polygon.is_valid:
+        raise ValueError(f"Invalid Area polygon: {shapely.is_valid_reason(query_polygon)}")
+    return query_polygon
+
+
+def query_coordinates_in_area(query_polygon, date=None, start_date=None, end_date=None):
+    try:
+        if memory_index_config['enabled']:
+            return query_area_from_index(query_polygon, date, start_date, end_date)
+
+        query, params = build_area_query(query_polygon, date, start_date, end_date)
+
+        with db_pool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query, params)
+
+            results = cursor.fetchall()
+
+        # 只对候选集做精确相交判断
+        shapely.prepare(query_polygon)
+        rows, geoms = decode_wkt(results, 'Location')
+        mask = shapely.intersects(geoms, query_polygon)
+        filtered_results = area_records([row for row, hit in zip(rows, mask) if hit], geoms[mask])
 
         return filtered_results
+    except PoolTimeout as e:
+        print("Pool Error:", e)
+        return {"error": "Database busy, please retry"}
+    except pymysql.MySQLError as e:
+        print("MySQL Error:", e)
+        return {"error": "Database query failed"}
+    except Exception as e:
+        print("General Error:", e)
+        return {"error": f"An error occurred: {e}"}
+
+
+def build_area_query(query_polygon, date=None, start_date=None, end_date=None):
+    """
+    构造区域查询 SQL：先用 MBRIntersects 走 Location 上的空间索引筛出候选集。
+    """
+    return build_polygon_query('greenland', AREA_FIELDS, date, start_date, end_date, area_wkt=query_polygon.wkt)
+
+
+def query_area_page(query_polygon, date, start_date, end_date, page):
+    """
+    分页 / 视口 / 字段裁剪版本的区域查询。
+    分页作用于 MBR 候选集，精确判断后本页可能少于 limit 条，应以 next_cursor 是否为空判断是否取完。
+    """
+    fields = page['fields'] or AREA_FIELDS
+    try:
+        query, params = build_polygon_query(
+            'greenland', fields, date, start_date, end_date, area_wkt=query_polygon.wkt,
+            bbox=page['bbox'], after=page['after'], limit=page['limit']
+        )
+        with db_pool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+
+        shapely.prepare(query_polygon)
+        rows, geoms = decode_wkt(results, 'Location')
+        mask = shapely.intersects(geoms, query_polygon)
+        return {
+            'polygons': area_records([row for row, hit in zip(rows, mask) if hit], geoms[mask], fields),
+            'next_cursor': results[-1]['ID'] if page['limit'] and len(results) == page['limit'] else None
+        }
+    except PoolTimeout as e:
+        print("Pool Error:", e)
+        return {"error": "Database busy, please retry"}
     except pymysql.MySQLError as e:
         print("MySQL Error:", e)
         return {"error": "Database query failed"}
@@ -204,6 +886,20 @@ def query_coordinates_in_area(area_coords):
         return {"error": f"An error occurred: {e}"}
 
 
+def query_area_from_index(query_polygon, date=None, start_date=None, end_date=None):
+    """
+    在内存 STRtree 索引上逐日期查询与区域相交的多边形。
+    """
+    dates = [date] if date else list_dates('greenland', start_date, end_date)
+
+    filtered_results = []
+    for query_date in dates:
+        entry = polygon_index.get('greenland', query_date)
+        hits = entry.query(query_polygon)
+        filtered_results.extend(area_records([entry.rows[i] for i in hits], entry.geoms[hits]))
+    return filtered_results
+
+
 @app.route('/api/coordinates_in_area', methods=['GET'])
 def get_coordinates_in_area():
     area = request.args.get('Area')
@@ -211,17 +907,306 @@ def get_coordinates_in_area():
         return jsonify({"error": "Missing required parameter: Area"}), 400
 
     try:
-        area_coords = eval(area)
-    except:
-        return jsonify({"error": "Invalid Area format. It should be an array of coordinates."}), 400
+        query_polygon = parse_area(area)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 可选过滤条件：Date 精确日期，StartDate / EndDate 日期范围
+    try:
+        date, start_date, end_date = parse_date_args('Date', 'StartDate', 'EndDate')
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date parameter: {e}"}), 400
+
+    try:
+        page = parse_page_args(AREA_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid paging parameter: {e}"}), 400
 
-    data = query_coordinates_in_area(area_coords)
+    mode = get_stream_mode()
+    if mode or is_paged(page):
+        if mode:
+            query, params = build_polygon_query(
+                'greenland', page['fields'] or AREA_FIELDS, date, start_date, end_date,
+                area_wkt=query_polygon.wkt, bbox=page['bbox'], after=page['after'], limit=page['limit']
+            )
+            return make_stream_response(
+                stream_area_features(query, params, query_polygon, page['fields'], mode), mode
+            )
+        data = query_area_page(query_polygon, date, start_date, end_date, page)
+    else:
+        data = query_coordinates_in_area(query_polygon, date=date, start_date=start_date, end_date=end_date)
     if "error" in data:
         return jsonify(data), 500
 
+    with stage('serialize'):
+        return jsonify(data)
+
+
+# /api/summary 返回的字段：每日汇总和网格汇总
+SUMMARY_FIELDS = ('Date', 'PolygonCount', 'TotalArea', 'TotalTrans', 'MaxIncreaseID', 'MaxIncrease',
+                  'MaxDecreaseID', 'MaxDecrease')
+CELL_SUMMARY_FIELDS = ('Date', 'CellRow', 'CellCol', 'PolygonCount', 'TotalArea', 'TotalTrans')
+
+
+def query_summary(group, start_date=None, end_date=None, bbox=None):
+    """
+    读取变化检测任务维护的汇总表：group='date' 每个日期一行，group='cell' 每个日期、每个网格单元一行。
+    bbox 只对网格汇总生效，选出与之相交的单元；网格单元附带 Bounds（与 Coordinates 相同的坐标顺序）。
+    """
+    cell_size = change_config['cell_size']
+    if group == 'cell':
+        table, fields, order = change_config['cell_summary'], CELL_SUMMARY_FIELDS, "Date, CellRow, CellCol"
+    else:
+        table, fields, order = change_config['summary'], SUMMARY_FIELDS, "Date"
+
+    conditions = []
+    params = []
+    if start_date:
+        conditions.append("Date >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("Date <= %s")
+        params.append(end_date)
+    if group == 'cell' and bbox:
+        conditions.append("CellRow BETWEEN %s AND %s AND CellCol BETWEEN %s AND %s")
+        params.extend([math.floor(bbox[0] / cell_size), math.floor(bbox[2] / cell_size),
+                       math.floor(bbox[1] / cell_size), math.floor(bbox[3] / cell_size)])
+
+    query = f"SELECT {', '.join(fields)} FROM {table}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {order}"
+
+    try:
+        with db_pool.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        if group == 'cell':
+            for row in rows:
+                row['Bounds'] = [row['CellRow'] * cell_size, row['CellCol'] * cell_size,
+                                 (row['CellRow'] + 1) * cell_size, (row['CellCol'] + 1) * cell_size]
+            return {'group': group, 'cell_size': cell_size, 'summaries': rows}
+        return {'group': group, 'summaries': rows}
+    except PoolTimeout as e:
+        print("Pool Error:", e)
+        return {"error": "Database busy, please retry"}
+    except pymysql.MySQLError as e:
+        print("MySQL Error:", e)
+        return {"error": "Database query failed"}
+    except Exception as e:
+        print("General Error:", e)
+        return {"error": f"An error occurred: {e}"}
+
+
+@app.route('/api/summary', methods=['GET'])
+def get_summary():
+    # 面积趋势：按日期（group=date）或按日期和网格单元（group=cell）返回汇总，可选 StartDate / EndDate / bbox
+    group = request.args.get('group', 'date')
+    if group not in ('date', 'cell'):
+        return jsonify({"error": "group must be date or cell"}), 400
+
+    bbox = request.args.get('bbox')
+    if bbox:
+        try:
+            bbox = [float(v) for v in bbox.split(',')]
+        except ValueError:
+            bbox = None
+        if bbox is None or len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            return jsonify({"error": "Invalid bbox parameter: bbox must be minx,miny,maxx,maxy"}), 400
+
+    data = query_summary(group, request.args.get('StartDate'), request.args.get('EndDate'), bbox)
+    if "error" in data:
+        return jsonify(data), 500
     return jsonify(data)
 
 
+@app.route('/api/pool_stats', methods=['GET'])
+def get_pool_stats():
+    # 连接池指标：使用中连接数、等待次数、等待时间等
+    return jsonify(db_pool.stats())
+
+
+@app.route('/api/cache_stats', methods=['GET'])
+def get_cache_stats():
+    # 内存空间索引和响应缓存的命中/未命中计数
+    return jsonify({
+        'polygon_index': polygon_index.stats(),
+        'response_cache': response_cache.stats(),
+        'tile_cache': tile_cache.stats()
+    })
+
+
+# /metrics 中各组件 stats() 对应的仪表，首次抓取时按字段创建
+component_gauges = {}
+
+
+def export_stats(prefix, stats, **labels):
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"yaogan_{prefix}_{key}"
+        if name not in component_gauges:
+            component_gauges[name] = Gauge(name, f"{prefix} stats() 中的 {key}", tuple(labels))
+        component_gauges[name].set(value, **labels)
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Prometheus 抓取接口：请求指标 + 连接池、缓存的当前状态
+    export_stats('db_pool', db_pool.stats())
+    export_stats('polygon_index', polygon_index.stats())
+    export_stats('cache', response_cache.stats(), cache='response')
+    export_stats('cache', tile_cache.stats(), cache='tile')
+    return app.response_class(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    # 入库脚本写入某日期的新数据后调用，失效该日期的缓存；不带 Date 时清空全部
+    try:
+        date, = parse_date_args('Date')
+    except ValueError as e:
+        return jsonify({"error": f"Invalid Date parameter: {e}"}), 400
+    return jsonify({
+        'Date': date,
+        'polygon_index_removed': polygon_index.invalidate(date),
+        'response_cache_removed': response_cache.invalidate(date),
+        'tile_cache_removed': tile_cache.invalidate(date)
+    })
+
+
+TILE_FIELDS = ('ID', 'Area', 'Coordinates', 'Change', 'Ratios')
+
+
+def tile_query_bbox(z, x, y):
+    """
+    瓦片（含缓冲区）的查询范围，按表中的 (纬度, 经度) 顺序返回 [min_lat, min_lon, max_lat, max_lon]。
+    """
+    min_lon, min_lat, max_lon, max_lat = tile_bounds_lonlat(z, x, y)
+    pad_lon = (max_lon - min_lon) * TILE_BUFFER / TILE_EXTENT
+    pad_lat = (max_lat - min_lat) * TILE_BUFFER / TILE_EXTENT
+    return [min_lat - pad_lat, min_lon - pad_lon, max_lat + pad_lat, max_lon + pad_lon]
+
+
+def load_tile_rows(date, z, x, y):
+    """
+    读取某日期与瓦片（含缓冲区）相交的多边形，返回 (行列表, 几何数组)。
+    """
+    bbox = tile_query_bbox(z, x, y)
+    if memory_index_config['enabled']:
+        entry = polygon_index.get('greenland6', date)
+        hits = np.sort(entry.tree.query(shapely.box(*bbox), predicate='intersects'))
+        return [entry.rows[i] for i in hits], entry.geoms[hits]
+
+    query, params = build_polygon_query('greenland6', TILE_FIELDS, date=date, bbox=bbox)
+    with db_pool.connection() as connection, connection.cursor() as cursor:
+        cursor.execute(query, params)
+        results = cursor.fetchall()
+    return decode_wkt(results, 'Location_WKT')
+
+
+@app.route('/tiles/<date>/<int:z>/<int:x>/<int:y>.mvt', methods=['GET'])
+def get_tile(date, z, x, y):
+    if mapbox_vector_tile is None:
+        return jsonify({"error": "Vector tiles require the mapbox-vector-tile package"}), 501
+    if not (0 <= z <= tile_config['max_zoom'] and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"error": "Invalid tile coordinates"}), 400
+    try:
+        date = parse_date(date)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date: {e}"}), 400
+
+    key = f"{z}/{x}/{y}"
+    cached = tile_cache.get(date, key)
+    if cached is None:
+        generation = tile_cache.generation(date)
+        try:
+            rows, geoms = load_tile_rows(date, z, x, y)
+        except PoolTimeout as e:
+            print("Pool Error:", e)
+            return jsonify({"error": "Database busy, please retry"}), 500
+        except pymysql.MySQLError as e:
+            print("MySQL Error:", e)
+            return jsonify({"error": "Database query failed"}), 500
+        cached = tile_cache.put(date, key, render_tile(rows, geoms, z, x, y), generation)
+
+    return make_cached_response(*cached, mimetype='application/vnd.mapbox-vector-tile')
+
+
+def seed_tiles(date, min_zoom, max_zoom):
+    """
+    预生成某日期在缩放级别范围内、覆盖其全部多边形的瓦片。
+    """
+    try:
+        generation = tile_cache.generation(date)
+        rows, geoms = decode_wkt(load_date_rows('greenland6', date), 'Location_WKT')
+        if not len(geoms):
+            return
+
+        tree = shapely.STRtree(geoms)
+        min_lat, min_lon, max_lat, max_lon = shapely.total_bounds(geoms)
+        count = 0
+        for z in range(min_zoom, max_zoom + 1):
+            for x, y in tiles_covering((min_lon, min_lat, max_lon, max_lat), z):
+                # 与 get_tile 按同样的缓冲范围取多边形，预生成的瓦片与按需生成的一致
+                hits = np.sort(tree.query(shapely.box(*tile_query_bbox(z, x, y))))
+                if not len(hits):
+                    continue
+                tile = render_tile([rows[i] for i in hits], geoms[hits], z, x, y)
+                tile_cache.put(date, f"{z}/{x}/{y}", tile, generation)
+                count += 1
+        print(f"Seeded {count} tiles for {date}, zoom {min_zoom}-{max_zoom}")
+    except Exception as e:
+        print(f"Seed tiles failed for {date}: {e}")
+
+
+# 正在预生成瓦片的日期 -> 运行期间收到的下一次请求的缩放级别范围（没有时为 None）
+_seeding = {}
+_seeding_lock = threading.Lock()
+
+
+def run_seed(date, min_zoom, max_zoom):
+    """
+    每个日期同时只有一个预生成线程；运行期间再次收到的请求合并为结束后的一次重跑。
+    """
+    while True:
+        seed_tiles(date, min_zoom, max_zoom)
+        with _seeding_lock:
+            queued = _seeding[date]
+            if queued is None:
+                del _seeding[date]
+                return
+            _seeding[date] = None
+        min_zoom, max_zoom = queued
+
+
+@app.route('/tiles/<date>/seed', methods=['POST'])
+def seed_date_tiles(date):
+    # 入库后预生成该日期的瓦片，在后台线程中执行
+    if mapbox_vector_tile is None:
+        return jsonify({"error": "Vector tiles require the mapbox-vector-tile package"}), 501
+    try:
+        min_zoom = int(request.args.get('min_zoom', tile_config['seed_min_zoom']))
+        max_zoom = int(request.args.get('max_zoom', tile_config['seed_max_zoom']))
+    except ValueError:
+        return jsonify({"error": "min_zoom and max_zoom must be integers"}), 400
+    if not 0 <= min_zoom <= max_zoom <= min(tile_config['seed_zoom_limit'], tile_config['max_zoom']):
+        return jsonify({"error": f"Invalid zoom range, max_zoom must not exceed {tile_config['seed_zoom_limit']}"}), 400
+    try:
+        date = parse_date(date)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date: {e}"}), 400
+
+    with _seeding_lock:
+        queued = date in _seeding
+        if queued:
+            _seeding[date] = (min_zoom, max_zoom)
+        else:
+            _seeding[date] = None
+            threading.Thread(target=run_seed, args=(date, min_zoom, max_zoom), daemon=True).start()
+    return jsonify({'Date': date, 'min_zoom': min_zoom, 'max_zoom': max_zoom, 'queued': queued}), 202
+
+
 # 启动 Flask 应用
 if __name__ == '__main__':
     app.run(host='0.0.0.0', debug=True)
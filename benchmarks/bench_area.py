@@ -0,0 +1,68 @@
+"""
+入库面积计算的基准测试：逐个多边形 shapely.ops.transform 到 EPSG:3857 的旧实现 vs geo_area.polygon_areas 批量投影，
+并以 pyproj.Geod 的椭球面积为参照比较各口径的误差。
+
+用法: python benchmarks/bench_area.py [--polygons 20000] [--repeat 3] [--sample 500]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pyproj
+from shapely.ops import transform
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_boundary_filter import make_scene  # noqa: E402
+from geo_area import polygon_areas  # noqa: E402
+
+
+def legacy_areas(geoms):
+    project_to_3857 = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True).transform
+    return np.array([transform(project_to_3857, polygon).area for polygon in geoms])
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--polygons', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sample', type=int, default=500)
+    args = parser.parse_args()
+    # 旧实现沿用的 shapely.ops.transform 在新版本中会给出弃用警告
+    warnings.simplefilter('ignore', DeprecationWarning)
+
+    geoms = np.array(make_scene(args.polygons, seed=0), dtype=object)
+    print(f"合成数据: {args.polygons} 个多边形")
+
+    legacy_time, legacy = best_of(lambda: legacy_areas(geoms), args.repeat)
+    mercator_time, mercator = best_of(lambda: polygon_areas(geoms, 'mercator'), args.repeat)
+    equal_time, equal = best_of(lambda: polygon_areas(geoms, 'equal_area'), args.repeat)
+    # 批量墨卡托与旧实现口径相同，结果必须一致
+    assert np.allclose(legacy, mercator)
+
+    print(f"旧实现 (逐个 transform, 3857): {legacy_time * 1000:8.1f} ms")
+    print(f"批量 mercator (3857):          {mercator_time * 1000:8.1f} ms, 加速比 {legacy_time / mercator_time:.1f}x")
+    print(f"批量 equal_area (6933):        {equal_time * 1000:8.1f} ms, 加速比 {legacy_time / equal_time:.1f}x")
+
+    geod = pyproj.Geod(ellps='WGS84')
+    reference = np.array([abs(geod.geometry_area_perimeter(polygon)[0]) for polygon in geoms[:args.sample]])
+    for name, areas in (('mercator', mercator), ('equal_area', equal)):
+        error = np.abs(areas[:args.sample] / reference - 1)
+        print(f"{name:>10} 相对椭球面积误差: 平均 {error.mean() * 100:.4f}%, 最大 {error.max() * 100:.4f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+/api/coordinates 响应编码的基准测试：JSON vs 二进制列式格式（服务端序列化 + 客户端解析）。
+
+用法: python benchmarks/bench_binary_format.py [--polygons 50000] [--vertices 12] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_date_assembly import make_rows  # noqa: E402
+from binary_format import decode_polygons, encode_polygons  # noqa: E402
+from geo_decode import assemble_date_result, decode_wkt, extreme_indices  # noqa: E402
+
+
+def json_encode(rows, geoms):
+    return json.dumps(assemble_date_result(rows, geoms), default=str).encode('utf-8')
+
+
+def binary_encode(rows, geoms, coord_bytes):
+    max_index, min_index = extreme_indices([row['Trans'] for row in rows])
+    return b''.join(encode_polygons(rows, geoms, coord_bytes, max_index, min_index))
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--polygons', type=int, default=50000)
+    parser.add_argument('--vertices', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows, geoms = decode_wkt(make_rows(args.polygons, args.vertices), 'Location_WKT')
+    print(f"合成数据: {args.polygons} 个多边形, 每个 {args.vertices + 1} 个顶点")
+
+    encode_time, body = best_of(lambda: json_encode(rows, geoms), args.repeat)
+    parse_time, _ = best_of(lambda: json.loads(body), args.repeat)
+    print(f"JSON:      序列化 {encode_time * 1000:8.1f} ms, 解析 {parse_time * 1000:8.3f} ms, {len(body) / 1e6:7.2f} MB")
+
+    for coord_bytes in (8, 4):
+        encode_time, body = best_of(lambda: binary_encode(rows, geoms, coord_bytes), args.repeat)
+        parse_time, decoded = best_of(lambda: decode_polygons(body), args.repeat)
+        assert len(decoded['ID']) == len(rows)
+        print(f"binary{coord_bytes * 8}:  序列化 {encode_time * 1000:8.1f} ms, "
+              f"解析 {parse_time * 1000:8.3f} ms, {len(body) / 1e6:7.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+入库边界筛选的基准测试：每个场景重新读取边界 Shapefile、逐个 within、每次新建转换器的旧实现
+vs 复用 IngestionContext（边界只加载一次并 prepare，批量判断和批量投影计算面积）的新实现。
+
+用法: python benchmarks/bench_boundary_filter.py [--scenes 20] [--polygons 2000] [--boundary-vertices 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import geopandas as gpd
+import numpy as np
+import pyproj
+from shapely.geometry import Polygon
+from shapely.ops import transform
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest_common import area_config, get_ingestion_context  # noqa: E402
+
+
+def make_boundary(n_vertices, seed=0):
+    """
+    生成一个顶点数与真实行政区边界相当的不规则多边形（深圳附近，经度, 纬度顺序）。
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    radius = 0.25 + 0.03 * rng.random(n_vertices)
+    return Polygon(np.column_stack([114.1 + radius * 1.6 * np.cos(angles), 22.65 + radius * np.sin(angles)]))
+
+
+def make_scene(n_polygons, seed):
+    """
+    生成一个场景的地理多边形，部分落在边界外。
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, 8, endpoint=False)
+    polygons = []
+    for _ in range(n_polygons):
+        lon, lat = 113.6 + rng.random() * 1.0, 22.3 + rng.random() * 0.7
+        r = 0.0005 + rng.random() * 0.002
+        polygons.append(Polygon(np.column_stack([lon + r * np.cos(angles), lat + r * np.sin(angles)])))
+    return polygons
+
+
+def legacy_filter(shp_path, geo_polygons):
+    shenzhen_boundary = gpd.read_file(shp_path).geometry.unary_union
+    filtered = [polygon for polygon in geo_polygons if polygon.within(shenzhen_boundary)]
+    project_to_3857 = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True).transform
+    return filtered, [transform(project_to_3857, polygon).area for polygon in filtered]
+
+
+def context_filter(shp_path, geo_polygons):
+    context = get_ingestion_context(shp_path)
+    filtered = [polygon for polygon, inside in zip(geo_polygons, context.within_boundary(geo_polygons)) if inside]
+    return filtered, context.metric_areas(filtered)
+
+
+def run(func, shp_path, scenes):
+    start = time.perf_counter()
+    results = [func(shp_path, scene) for scene in scenes]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenes', type=int, default=20)
+    parser.add_argument('--polygons', type=int, default=2000)
+    parser.add_argument('--boundary-vertices', type=int, default=5000)
+    args = parser.parse_args()
+    # 旧实现沿用的 unary_union / shapely.ops.transform 在新版本中会给出弃用警告
+    warnings.simplefilter('ignore', DeprecationWarning)
+    # 旧实现按 EPSG:3857 计算面积，新实现使用同一口径才能逐个比较面积
+    area_config['method'] = 'mercator'
+
+    scenes = [make_scene(args.polygons, seed) for seed in range(args.scenes)]
+    with tempfile.TemporaryDirectory() as tmp:
+        shp_path = os.path.join(tmp, 'boundary.shp')
+        gpd.GeoDataFrame(geometry=[make_boundary(args.boundary_vertices)], crs='EPSG:4326').to_file(shp_path)
+        print(f"合成数据: {args.scenes} 个场景, 每个 {args.polygons} 个多边形, 边界 {args.boundary_vertices} 个顶点")
+
+        legacy_time, legacy = run(legacy_filter, shp_path, scenes)
+        new_time, new = run(context_filter, shp_path, scenes)
+
+    # 两种实现筛选出的多边形和面积必须一致
+    for (legacy_polygons, legacy_areas), (new_polygons, new_areas) in zip(legacy, new):
+        assert len(legacy_polygons) == len(new_polygons)
+        assert np.allclose(legacy_areas, new_areas)
+
+    print(f"旧实现 (每场景加载边界):   {legacy_time * 1000:8.1f} ms, 每场景 {legacy_time / args.scenes * 1000:.1f} ms")
+    print(f"新实现 (IngestionContext): {new_time * 1000:8.1f} ms, 每场景 {new_time / args.scenes * 1000:.1f} ms")
+    print(f"加速比: {legacy_time / new_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+掩膜轮廓提取的基准测试：噪点很多的合成掩膜上，整幅提取全部轮廓（旧流程）
+vs 裁剪到边界外包框 vs 连通域过滤小斑块 vs 两者同时启用，均包含地理配准和外包框筛选。
+
+用法: python benchmarks/bench_contours.py [--size 6000] [--blobs 2000] [--speckles 200000] [--min-pixels 64] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contour_extraction import extract_mask_polygons  # noqa: E402
+from georef import affine_from_bounds  # noqa: E402
+
+# 掩膜覆盖的地理范围和边界外包框（经度, 纬度顺序），外包框约占掩膜的一半
+MASK_BOUNDS = shapely.box(113.6, 22.3, 114.6, 23.0)
+BOUNDARY_BOUNDS = (113.75, 22.45, 114.45, 22.85)
+
+
+def make_mask(size, n_blobs, n_speckles, seed=0):
+    """
+    生成 size x size 的掩膜：n_blobs 个大小不一的绿地斑块（部分带洞）和 n_speckles 个 1~3 像素的噪点。
+    """
+    rng = np.random.default_rng(seed)
+    image = np.zeros((size, size), dtype=np.uint8)
+    for _ in range(n_blobs):
+        center = (int(rng.integers(0, size)), int(rng.integers(0, size)))
+        radius = int(rng.integers(5, 60))
+        cv2.circle(image, center, radius, 255, -1)
+        if radius > 30 and rng.random() < 0.3:
+            cv2.circle(image, center, radius // 3, 0, -1)
+    rows = rng.integers(0, size - 3, n_speckles)
+    cols = rng.integers(0, size - 3, n_speckles)
+    extents = rng.integers(1, 4, n_speckles)
+    for row, col, extent in zip(rows, cols, extents):
+        image[row:row + extent, col:col + extent] = 255
+    return image
+
+
+def run(png_path, config, repeat):
+    """
+    返回 (最短耗时, 完全位于边界外包框内的多边形)。
+    """
+    box = shapely.box(*BOUNDARY_BOUNDS)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # 不输出每次读图的日志
+            polygons = extract_mask_polygons(
+                png_path, lambda height, width: affine_from_bounds(MASK_BOUNDS, width, height),
+                blur=config.get('blur', False), config=config, boundary_bounds=BOUNDARY_BOUNDS
+            )
+        polygons = polygons[shapely.within(polygons, box)]
+        best = min(best, time.perf_counter() - start)
+    return best, polygons
+
+
+def normalized(polygons):
+    return sorted(shapely.to_wkb(shapely.normalize(polygons)).tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=6000)
+    parser.add_argument('--blobs', type=int, default=2000)
+    parser.add_argument('--speckles', type=int, default=200000)
+    parser.add_argument('--min-pixels', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        png_path = os.path.join(tmp, 'mask.png')
+        cv2.imwrite(png_path, make_mask(args.size, args.blobs, args.speckles))
+        print(f"合成掩膜: {args.size}x{args.size}, {args.blobs} 个斑块, {args.speckles} 个噪点")
+
+        for blur in (False, True):
+            cases = [
+                ('整幅提取', {}),
+                ('裁剪到外包框', {'crop_to_boundary': True}),
+                (f'过滤 <{args.min_pixels} 像素斑块', {'min_blob_pixels': args.min_pixels}),
+                ('裁剪 + 过滤', {'crop_to_boundary': True, 'min_blob_pixels': args.min_pixels}),
+            ]
+            results = [(name, *run(png_path, dict(config, blur=blur), args.repeat)) for name, config in cases]
+
+            # 裁剪只会多出跨越窗口边的斑块的洞中的斑块；过滤只去掉小斑块
+            for full, cropped in ((results[0][2], results[1][2]), (results[2][2], results[3][2])):
+                assert set(normalized(full)) <= set(normalized(cropped))
+            assert set(normalized(results[2][2])) <= set(normalized(results[0][2]))
+
+            baseline = results[0][1]
+            print(f"\n{'高斯模糊' if blur else '不模糊'}:")
+            for name, elapsed, polygons in results:
+                print(f"  {name:<16} {elapsed * 1000:8.1f} ms, 多边形 {len(polygons):6d} 个, 加速比 {baseline / elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+同一日期多边形去重的基准测试：两个相互重叠的场景各提取出一份略有偏移的多边形，
+比较 PolygonDeduper（STRtree + IoU）与逐对比较的朴素实现，并测试数十万多边形规模下的耗时。
+
+用法: python benchmarks/bench_dedupe.py [--polygons 200000] [--naive 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from polygon_dedupe import PolygonDeduper  # noqa: E402
+
+
+def make_scenes(n_polygons, seed=0):
+    """
+    生成两个场景的 (面积, WKB) 记录：第二个场景是第一个整体平移 2% 边长后的结果，另加一半不重叠的新多边形。
+    """
+    rng = np.random.default_rng(seed)
+    size = 0.0005
+    xy = np.column_stack([22.5 + rng.random(n_polygons) * 0.3, 113.8 + rng.random(n_polygons) * 0.6])
+    first = shapely.box(xy[:, 0], xy[:, 1], xy[:, 0] + size, xy[:, 1] + size)
+    shifted = shapely.box(xy[:, 0] + size * 0.02, xy[:, 1], xy[:, 0] + size * 1.02, xy[:, 1] + size)
+    extra_xy = np.column_stack([23.0 + rng.random(n_polygons // 2) * 0.3, 113.8 + rng.random(n_polygons // 2) * 0.6])
+    extra = shapely.box(extra_xy[:, 0], extra_xy[:, 1], extra_xy[:, 0] + size, extra_xy[:, 1] + size)
+    second = np.concatenate([shifted, extra])
+
+    def records(geoms):
+        return list(zip((shapely.area(geoms) * 1e10).tolist(), shapely.to_wkb(geoms).tolist()))
+    return records(first), records(second)
+
+
+def naive_dedupe(accepted, records, iou_threshold):
+    """
+    朴素实现：每个新多边形与所有已接受的多边形逐一计算 IoU。
+    """
+    kept = []
+    for area, wkb in records:
+        geom = shapely.from_wkb(wkb)
+        duplicate = False
+        for other in accepted:
+            if geom.intersects(other):
+                inter = geom.intersection(other).area
+                if inter / (geom.area + other.area - inter) >= iou_threshold:
+                    duplicate = True
+                    break
+        if not duplicate:
+            kept.append((area, wkb))
+            accepted.append(geom)
+    return kept
+
+
+def run_deduper(first, second):
+    deduper = PolygonDeduper(0.5)
+    start = time.perf_counter()
+    kept_first = deduper.filter('2024-01-01', first)
+    kept_second = deduper.filter('2024-01-01', second)
+    return time.perf_counter() - start, len(kept_first), len(kept_second)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--polygons', type=int, default=200000)
+    parser.add_argument('--naive', type=int, default=2000)
+    args = parser.parse_args()
+
+    first, second = make_scenes(args.naive)
+    start = time.perf_counter()
+    accepted = []
+    naive_first = naive_dedupe(accepted, first, 0.5)
+    naive_second = naive_dedupe(accepted, second, 0.5)
+    naive_time = time.perf_counter() - start
+    tree_time, kept_first, kept_second = run_deduper(first, second)
+    # 两种实现保留的多边形数量必须一致
+    assert (len(naive_first), len(naive_second)) == (kept_first, kept_second)
+    print(f"{args.naive} 个多边形/场景: 逐对比较 {naive_time * 1000:8.1f} ms, STRtree {tree_time * 1000:8.1f} ms, "
+          f"加速比 {naive_time / tree_time:.1f}x")
+
+    first, second = make_scenes(args.polygons)
+    tree_time, kept_first, kept_second = run_deduper(first, second)
+    print(f"{args.polygons} 个多边形/场景: STRtree {tree_time * 1000:8.1f} ms, "
+          f"第二个场景保留 {kept_second}/{len(second)} 个")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,501 @@
+"""
+入库与 API 热点路径的可复现基准测试套件。
+
+按固定随机种子生成合成数据（掩膜 PNG + JSON / JGW 元数据 + 边界 Shapefile），依次测量：
+    extract_json / extract_jgw  两个入库脚本的 extract_scene（轮廓提取、地理配准、边界筛选、面积计算），不访问数据库
+    ingest_json / ingest_jgw    两个入库脚本的 load_scenes 完整写库（jgw 脚本写入后会触发变化检测生成 greenland6）
+    api                         /api/coordinates（整日期、分页）和 /api/coordinates_in_area 的冷启动与并发压测
+每个阶段在独立子进程中运行，分别记录峰值 RSS；结果写入 JSON 报告，可用 --compare 与之前的报告对比。
+
+写库和 API 阶段需要一个本地 MySQL 8（例如 docker run -e MYSQL_ROOT_PASSWORD=bench -p 3306:3306 mysql:8），
+套件会在 --database 指定的库中重建 greenland / greenland2 / greenland3 / greenland6 并依次执行 migrations/ 下的迁移，
+库名不含 bench 时需加 --force；
+数据库不可用时这些阶段记为 skipped，其余阶段照常运行。
+API 默认在进程内用 Flask 测试客户端驱动，--url 指定时改为压测已启动的服务（此时服务端应连接同一个库）。
+
+用法: python benchmarks/run_suite.py [--scenes 24] [--dates 3] [--size 1024] [--workers 4]
+                                     [--db-host 127.0.0.1] [--db-password bench] [--database yaogan_bench] [--force]
+                                     [--url http://127.0.0.1:5000] [--requests 200] [--concurrency 8]
+                                     [--output report.json] [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import geopandas as gpd
+import numpy as np
+import pymysql
+import shapely
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，峰值 RSS 记为 null
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ingest_common  # noqa: E402
+from ingest_common import run_scenes  # noqa: E402
+
+# 合成数据覆盖的经纬度范围（深圳附近）
+EXTENT = (113.75, 22.45, 114.6, 22.85)
+
+# 基准库名须包含该标记（或指定 --force），避免误清空业务库
+BENCH_DATABASE_MARKER = 'bench'
+
+# 基准库的基础表结构，索引和其余表由 migrations/ 下的迁移建立
+BASE_TABLES = {
+    'greenland': "ID INT PRIMARY KEY, Date DATE NOT NULL, Area DOUBLE, Location GEOMETRY",
+    'greenland2': "ID INT PRIMARY KEY, Date DATE NOT NULL, Area DOUBLE, Location GEOMETRY",
+    'greenland3': "ID INT PRIMARY KEY, Date DATE NOT NULL, Area DOUBLE, Location GEOMETRY",
+    'greenland6': "ID INT PRIMARY KEY, Date DATE NOT NULL, Area DOUBLE, Location GEOMETRY, Center GEOMETRY, "
+                  "Ratios DOUBLE NULL, Trans DOUBLE NULL"
+}
+
+
+def load_script(filename):
+    """
+    按路径导入仓库根目录下文件名带连字符的脚本，并注册到 sys.modules 以便进程池反序列化其中的函数。
+    """
+    name = os.path.splitext(filename)[0].replace('-', '_')
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+def peak_rss_mb():
+    """
+    当前进程及已结束子进程的峰值 RSS（MB），不支持时返回 None。
+    """
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+# ---------------------------------------------------------------- 合成数据
+
+def generate_dataset(root, n_scenes, n_dates, size, blobs, seed=0):
+    """
+    生成 n_scenes 个场景：场景按地点排列成网格，每个地点在 n_dates 个日期各有一景，
+    同一地点不同日期的绿地在位置、大小上略有变化，少量绿地消失或新增，供去重和变化检测使用。
+    返回数据目录信息。
+    """
+    rng = np.random.default_rng(seed)
+    dirs = {name: os.path.join(root, name) for name in ('metadata', 'png', 'boundary')}
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+
+    n_locations = math.ceil(n_scenes / n_dates)
+    columns = math.ceil(math.sqrt(n_locations))
+    rows = math.ceil(n_locations / columns)
+    tile_width = (EXTENT[2] - EXTENT[0]) / columns
+    tile_height = (EXTENT[3] - EXTENT[1]) / rows
+    base = [
+        (rng.random((blobs, 2)) * size, size * (0.004 + rng.random((blobs, 2)) * 0.02), rng.random(blobs) * 180)
+        for _ in range(n_locations)
+    ]
+    dates = [datetime.date(2024, 1, 1) + datetime.timedelta(days=30 * i) for i in range(n_dates)]
+
+    for index in range(n_scenes):
+        location, date_index = index % n_locations, index // n_locations
+        centers, axes, angles = base[location]
+        jitter = np.random.default_rng(seed + 1 + index)
+        scale = 0.85 + jitter.random(blobs) * 0.3
+        present = jitter.random(blobs) > 0.05
+
+        image = np.zeros((size, size), dtype=np.uint8)
+        for k in np.flatnonzero(present):
+            center = centers[k] + jitter.normal(0, 1.5, 2)
+            cv2.ellipse(image, (int(center[0]), int(center[1])), (int(axes[k, 0] * scale[k]) + 1, int(axes[k, 1] * scale[k]) + 1),
+                        float(angles[k]), 0, 360, 255, -1)
+
+        min_lon = EXTENT[0] + (location % columns) * tile_width
+        max_lat = EXTENT[3] - (location // columns) * tile_height
+        key = index + 1
+        cv2.imwrite(os.path.join(dirs['png'], f"GF_L1A{key:07d}.png"), image)
+        with open(os.path.join(dirs['metadata'], f"scene-{key}.json"), 'w') as f:
+            json.dump({
+                'topleftlatitude': max_lat,
+                'topleftlongitude': min_lon,
+                'bottomrightlatitude': max_lat - tile_height,
+                'bottomrightlongitude': min_lon + tile_width,
+                'starttime': f"{dates[date_index]} 10:30:00"
+            }, f)
+        # parse_jgw 会把前四个参数除以 10
+        with open(os.path.join(dirs['metadata'], f"scene-{key}.jgw"), 'w') as f:
+            f.write("\n".join(str(v) for v in (
+                tile_width / size * 10, 0.0, 0.0, -tile_height / size * 10, min_lon, max_lat
+            )) + "\n")
+
+    # 边界取范围内切的不规则多边形，使一部分多边形被边界筛掉
+    center_lon, center_lat = (EXTENT[0] + EXTENT[2]) / 2, (EXTENT[1] + EXTENT[3]) / 2
+    angles = np.linspace(0, 2 * np.pi, 64, endpoint=False)
+    radius = 1 - 0.15 * np.abs(np.sin(3 * angles))
+    boundary = shapely.Polygon(np.column_stack([
+        center_lon + (EXTENT[2] - EXTENT[0]) / 2 * radius * np.cos(angles),
+        center_lat + (EXTENT[3] - EXTENT[1]) / 2 * radius * np.sin(angles)
+    ]))
+    shp_path = os.path.join(dirs['boundary'], 'boundary.shp')
+    gpd.GeoDataFrame(geometry=[boundary], crs='EPSG:4326').to_file(shp_path)
+
+    dirs['shp'] = shp_path
+    dirs['dates'] = [str(date) for date in dates]
+    return dirs
+
+
+def match_dataset(script, dataset):
+    module = load_script(script)
+    if script == 'json-calculate-sql.py':
+        return module, module.match_scenes(dataset['metadata'], dataset['png'], dataset['shp'], verbose=False)
+    return module, module.match_scenes(dataset['metadata'], dataset['png'], dataset['metadata'], dataset['shp'],
+                                       verbose=False)
+
+
+# ---------------------------------------------------------------- 各阶段
+
+def bench_extract(script, dataset, workers):
+    """
+    只运行 extract_scene，测量场景提取吞吐量。
+    """
+    module, (_, scenes) = match_dataset(script, dataset)
+    start = time.perf_counter()
+    polygons = 0
+    for _, result in run_scenes(module.extract_scene, scenes, workers):
+        if result is not None:
+            polygons += len(result[1])
+    elapsed = time.perf_counter() - start
+    return {
+        'scenes': len(scenes),
+        'polygons': polygons,
+        'seconds': elapsed,
+        'scenes_per_sec': len(scenes) / elapsed,
+        'polygons_per_sec': polygons / elapsed
+    }
+
+
+def prepare_database(db):
+    """
+    重建基准库的表并依次执行迁移。
+    """
+    connection = pymysql.connect(**db)
+    try:
+        with connection.cursor() as cursor:
+            for table in ('ingest_manifest', 'greenland_date_summary', 'greenland_cell_summary', *BASE_TABLES):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            for table, columns in BASE_TABLES.items():
+                cursor.execute(f"CREATE TABLE {table} ({columns})")
+            migrations = os.path.join(ROOT, 'migrations')
+            for filename in sorted(os.listdir(migrations)):
+                if not filename.endswith('.sql'):
+                    continue
+                with open(os.path.join(migrations, filename), encoding='utf-8') as f:
+                    sql = "\n".join(line for line in f if not line.lstrip().startswith('--'))
+                for statement in sql.split(';'):
+                    if statement.strip():
+                        cursor.execute(statement)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def bench_ingest(script, dataset, db, workers):
+    """
+    运行 load_scenes 完整写库，测量场景和行的写入吞吐量。
+    """
+    module, (scene_keys, scenes) = match_dataset(script, dataset)
+    # 基准测试不通知 API；load_scenes 在 ingest_common 中按模块全局名调用通知函数
+    ingest_common.notify_dates_loaded = lambda *args, **kwargs: set()
+    connection = pymysql.connect(**db)
+    try:
+        start = time.perf_counter()
+        rows = module.load_scenes(scene_keys, scenes, connection, workers=workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        connection.close()
+    return {
+        'scenes': len(scenes),
+        'rows': rows,
+        'seconds': elapsed,
+        'scenes_per_sec': len(scenes) / elapsed,
+        'rows_per_sec': rows / elapsed
+    }
+
+
+def latency_stats(latencies, elapsed=None, errors=0):
+    latencies = np.asarray(latencies) * 1000
+    stats = {'requests': int(len(latencies)), 'errors': errors}
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        stats.update({
+            'mean_ms': float(latencies.mean()), 'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99),
+            'max_ms': float(latencies.max())
+        })
+    if elapsed:
+        stats['requests_per_sec'] = len(latencies) / elapsed
+    return stats
+
+
+def make_workload(dataset, n_areas, seed=0):
+    """
+    各接口的请求 URL 列表。区域查询为数据范围内随机的小矩形，坐标为与表中一致的 (纬度, 经度) 顺序。
+    """
+    rng = np.random.default_rng(seed)
+    areas = []
+    for _ in range(n_areas):
+        lon = EXTENT[0] + rng.random() * (EXTENT[2] - EXTENT[0]) * 0.9
+        lat = EXTENT[1] + rng.random() * (EXTENT[3] - EXTENT[1]) * 0.9
+        width, height = 0.02 + rng.random() * 0.06, 0.02 + rng.random() * 0.04
+        areas.append([[lat, lon], [lat + height, lon], [lat + height, lon + width], [lat, lon + width], [lat, lon]])
+    return {
+        'coordinates': [f"/api/coordinates?Date={date}" for date in dataset['dates']],
+        'coordinates_page': [f"/api/coordinates?Date={date}&limit=1000" for date in dataset['dates']],
+        'coordinates_in_area': [
+            "/api/coordinates_in_area?" + urllib.parse.urlencode({'Date': date, 'Area': json.dumps(area)})
+            for date in dataset['dates'] for area in areas
+        ]
+    }
+
+
+def make_client(db, url):
+    """
+    返回 (get(path) -> 状态码, post(path) -> 状态码)。url 为空时在进程内加载 back-flask.py 并连接基准库。
+    """
+    if url:
+        def send(path, method):
+            request = urllib.request.Request(url.rstrip('/') + path, method=method)
+            try:
+                with urllib.request.urlopen(request, timeout=120) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as e:
+                return e.code
+        return (lambda path: send(path, 'GET')), (lambda path: send(path, 'POST'))
+
+    api = load_script('back-flask.py')
+    api.db_pool = api.ConnectionPool(dict(api.db_config, **db), **api.pool_config)
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = api.app.test_client()
+        return local.client
+
+    def get(path):
+        response = client().get(path)
+        response.get_data()  # 流式响应需要读完
+        return response.status_code
+    return get, (lambda path: client().post(path).status_code)
+
+
+def bench_api(dataset, db, url, n_requests, concurrency, n_areas, seed=0):
+    """
+    冷启动：每个 URL 请求前清空服务端缓存，测量未命中缓存时的延迟；
+    并发：concurrency 个线程随机请求 n_requests 次，包含缓存命中，测量稳态延迟和吞吐量。
+    """
+    get, post = make_client(db, url)
+    rng = np.random.default_rng(seed)
+    report = {}
+    for endpoint, urls in make_workload(dataset, n_areas, seed).items():
+        cold, errors = [], 0
+        for path in urls:
+            post('/api/cache/invalidate')
+            start = time.perf_counter()
+            errors += get(path) != 200
+            cold.append(time.perf_counter() - start)
+
+        def timed(path):
+            start = time.perf_counter()
+            status = get(path)
+            return time.perf_counter() - start, status
+
+        picks = [urls[i] for i in rng.integers(0, len(urls), n_requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed, picks))
+        elapsed = time.perf_counter() - start
+        report[endpoint] = {
+            'cold': latency_stats(cold, errors=errors),
+            'load': latency_stats([t for t, _ in results], elapsed, sum(status != 200 for _, status in results))
+        }
+    return report
+
+
+# ---------------------------------------------------------------- 运行与报告
+
+def _stage_main(conn, func, args, quiet):
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            result = func(*args)
+        result['peak_rss_mb'] = peak_rss_mb()
+        conn.send(('ok', result))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+    finally:
+        conn.close()
+
+
+def run_stage(name, func, *args, quiet=True):
+    """
+    在独立子进程中运行一个阶段，使每个阶段的峰值 RSS 互不影响。
+    """
+    print(f"运行阶段 {name} ...")
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_stage_main, args=(child, func, args, quiet))
+    process.start()
+    child.close()
+    try:
+        status, payload = parent.recv()
+    except EOFError:
+        status, payload = 'error', f"子进程异常退出，退出码 {process.exitcode}"
+    process.join()
+    if status != 'ok':
+        print(f"阶段 {name} 失败: {payload}")
+        return {'error': payload.splitlines()[0]}
+    return payload
+
+
+def flatten(report, prefix=''):
+    values = {}
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = value
+    return values
+
+
+def compare_reports(old, new):
+    """
+    逐项打印两份报告中共有的数值指标及变化比例。
+    """
+    old_values, new_values = flatten(old['stages']), flatten(new['stages'])
+    print(f"{'指标':<52} {'基线':>12} {'本次':>12} {'变化':>8}")
+    for key in sorted(old_values.keys() & new_values.keys()):
+        before, after = old_values[key], new_values[key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else '-'
+        print(f"{key:<52} {before:>12.2f} {after:>12.2f} {change:>8}")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'cache', 'bench_suite'), help='合成数据目录')
+    parser.add_argument('--scenes', type=int, default=24)
+    parser.add_argument('--dates', type=int, default=3)
+    parser.add_argument('--size', type=int, default=1024, help='掩膜边长（像素）')
+    parser.add_argument('--blobs', type=int, default=400, help='每景绿地数量')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) - 1))
+    parser.add_argument('--db-host', default='127.0.0.1')
+    parser.add_argument('--db-port', type=int, default=3306)
+    parser.add_argument('--db-user', default='root')
+    parser.add_argument('--db-password', default='bench')
+    parser.add_argument('--database', default='yaogan_bench', help='基准库名，会被清空重建，须包含 bench')
+    parser.add_argument('--force', action='store_true', help='允许使用名称不含 bench 的库')
+    parser.add_argument('--skip-db', action='store_true', help='只运行不访问数据库的阶段')
+    parser.add_argument('--url', help='压测已启动的 API 服务，不指定时在进程内运行 back-flask.py')
+    parser.add_argument('--requests', type=int, default=200, help='每个接口并发阶段的请求数')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--areas', type=int, default=10, help='每个日期的区域查询数量')
+    parser.add_argument('--output', default='bench_report.json')
+    parser.add_argument('--compare', help='与之前的报告对比')
+    parser.add_argument('--verbose', action='store_true', help='显示入库脚本自身的输出')
+    args = parser.parse_args()
+    # prepare_database 会删除并重建业务表，防止误指向生产库
+    if not args.skip_db and BENCH_DATABASE_MARKER not in args.database.lower() and not args.force:
+        parser.error(f"--database {args.database} 不含 '{BENCH_DATABASE_MARKER}'，会被清空重建；确认无误请加 --force")
+
+    dataset = generate_dataset(args.data_dir, args.scenes, args.dates, args.size, args.blobs, args.seed)
+    print(f"合成数据: {args.scenes} 景, {args.dates} 个日期, {args.size}x{args.size} 像素, 目录 {args.data_dir}")
+    quiet = not args.verbose
+
+    stages = {}
+    for script, name in (('json-calculate-sql.py', 'json'), ('jgw-calculate-sql.py', 'jgw')):
+        stages[f"extract_{name}"] = run_stage(f"extract_{name}", bench_extract, script, dataset, args.workers, quiet=quiet)
+
+    db = {
+        'host': args.db_host, 'port': args.db_port, 'user': args.db_user, 'password': args.db_password,
+        'database': args.database, 'charset': 'utf8mb4'
+    }
+    skip_reason = '--skip-db' if args.skip_db else None
+    if skip_reason is None:
+        try:
+            prepare_database(db)
+        except pymysql.MySQLError as e:
+            skip_reason = f"数据库不可用: {e}"
+    if skip_reason is None:
+        for script, name in (('json-calculate-sql.py', 'json'), ('jgw-calculate-sql.py', 'jgw')):
+            stages[f"ingest_{name}"] = run_stage(f"ingest_{name}", bench_ingest, script, dataset, db, args.workers,
+                                                 quiet=quiet)
+        # /api/coordinates_in_area 查询 greenland 表，用 json 脚本的入库结果填充
+        connection = pymysql.connect(**db)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO greenland (ID, Date, Area, Location) "
+                               "SELECT ID, Date, Area, Location FROM greenland2")
+            connection.commit()
+        finally:
+            connection.close()
+        stages['api'] = run_stage('api', bench_api, dataset, db, args.url, args.requests, args.concurrency, args.areas,
+                                  args.seed, quiet=quiet)
+    else:
+        print(f"跳过写库和 API 阶段: {skip_reason}")
+        stages.update({name: {'skipped': skip_reason} for name in ('ingest_json', 'ingest_jgw', 'api')})
+
+    report = {
+        'meta': {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key != 'db_password'}
+        },
+        'stages': stages
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已写入 {args.output}")
+
+    for name, stage in stages.items():
+        summary = ', '.join(f"{key}={value:.2f}" for key, value in flatten(stage).items()
+                            if key.endswith(('per_sec', 'p50_ms', 'p99_ms', 'peak_rss_mb')))
+        print(f"{name:<14} {summary or stage}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
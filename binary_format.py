@@ -0,0 +1,112 @@
+"""
+多边形结果的紧凑二进制编码（GeoArrow 风格的列式布局），所有数值均为小端序。
+
+    头部（40 字节）:
+        magic        4s   b'YGPB'
+        version      u8   1
+        coord_bytes  u8   坐标精度，4 = float32，8 = float64
+        reserved     u16
+        n_polygons   u32
+        n_coords     u64  坐标点总数
+        max_index    i32  面积变化最大的多边形下标，-1 表示无
+        min_index    i32  面积变化最小的多边形下标，-1 表示无
+        next_cursor  i64  分页游标，-1 表示已取完
+    之后依次为以下数组，每段都按 8 字节对齐，客户端可以直接建立 TypedArray 视图:
+        ID           int64[n_polygons]
+        Area         float64[n_polygons]
+        Change       float64[n_polygons]   (Trans，空值为 NaN)
+        Ratios       float64[n_polygons]   (空值为 NaN)
+        Center       float64[n_polygons * 2]   (与 Coordinates 同样的坐标顺序，空值为 NaN)
+        ring_offsets uint32[n_polygons + 1]   第 i 个多边形外环的坐标为 coords[ring_offsets[i]:ring_offsets[i + 1]]
+        coords       float32/float64[n_coords * 2]   交错存放的 (x, y)
+"""
+import struct
+
+import numpy as np
+import shapely
+
+MIMETYPE = 'application/vnd.yaogan.polygons'
+MAGIC = b'YGPB'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sBBHIQiiq')
+_HEADER_SIZE = 40
+
+
+def _padding(size):
+    return b'\0' * (-size % 8)
+
+
+def _column(rows, field):
+    return np.array([row[field] for row in rows], dtype='<f8')  # None 转为 NaN
+
+
+def encode_polygons(rows, geoms, coord_bytes=8, max_index=None, min_index=None, next_cursor=None):
+    """
+    把 greenland6 记录和外环几何编码为二进制缓冲区列表（各段直接取自 NumPy 数组，不逐点转换）。
+    """
+    n = len(rows)
+    rings = shapely.get_exterior_ring(geoms)
+    coords = shapely.get_coordinates(rings)
+    if coord_bytes == 4:
+        coords = coords.astype('<f4')
+    offsets = np.zeros(n + 1, dtype='<u4')
+    np.cumsum(shapely.get_num_coordinates(rings), out=offsets[1:])
+
+    centers = shapely.from_wkt([row['Center_WKT'] for row in rows], on_invalid='ignore')
+    center_coords = np.full((n, 2), np.nan)
+    present = ~shapely.is_missing(centers) & ~shapely.is_empty(centers)
+    center_coords[present] = shapely.get_coordinates(centers[present])
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, coord_bytes, 0, n, len(coords),
+        -1 if max_index is None else max_index,
+        -1 if min_index is None else min_index,
+        -1 if next_cursor is None else next_cursor
+    )
+    buffers = [header, _padding(len(header))]
+    for array in (
+        np.array([row['ID'] for row in rows], dtype='<i8'),
+        _column(rows, 'Area'),
+        _column(rows, 'Trans'),
+        _column(rows, 'Ratios'),
+        center_coords.astype('<f8'),
+        offsets,
+        np.ascontiguousarray(coords)
+    ):
+        # 空数组的 memoryview 不能 cast（n_polygons 或 n_coords 为 0，如分页的最后一页）
+        view = memoryview(array).cast('B') if array.size else b''
+        buffers.append(view)
+        buffers.append(_padding(len(view)))
+    return buffers
+
+
+def decode_polygons(data):
+    """
+    解码 encode_polygons 的输出，返回各列的 NumPy 视图（不复制数据）。
+    """
+    magic, version, coord_bytes, _, n, n_coords, max_index, min_index, next_cursor = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Unsupported polygon buffer")
+
+    result = {
+        'max_index': None if max_index < 0 else max_index,
+        'min_index': None if min_index < 0 else min_index,
+        'next_cursor': None if next_cursor < 0 else next_cursor
+    }
+    offset = _HEADER_SIZE
+    for name, dtype, count in (
+        ('ID', '<i8', n),
+        ('Area', '<f8', n),
+        ('Change', '<f8', n),
+        ('Ratios', '<f8', n),
+        ('Center', '<f8', n * 2),
+        ('ring_offsets', '<u4', n + 1),
+        ('coords', '<f4' if coord_bytes == 4 else '<f8', n_coords * 2)
+    ):
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes + (-array.nbytes % 8)
+        result[name] = array
+    result['Center'] = result['Center'].reshape(n, 2)
+    result['coords'] = result['coords'].reshape(n_coords, 2)
+    return result
@@ -0,0 +1,225 @@
+"""
+入库后的变化检测：把入库表（greenland2 / greenland3）某日期的多边形与上一日期匹配，
+批量计算面积变化（Trans）、面积比（Ratios）和中心点（Center），写入 API 读取的 greenland6，
+并在 greenland_date_summary 中记录每个日期的多边形数量、总面积、总面积变化和面积变化最大/最小的记录，
+在 greenland_cell_summary 中按中心点所在的网格单元记录同样的数量、面积和面积变化
+（见 migrations/004_change_detection.sql、005_summary_totals.sql），供 /api/summary 画趋势图。
+入库表按日期读取依赖 migrations/007_ingest_date_indexes.sql 中的 (Date, ID) 索引。
+
+匹配规则：用上一日期多边形建立 STRtree，每个多边形取相交面积最大的上一日期多边形作为对应；
+    Trans  = Area - 对应多边形的 Area，没有对应时视为新增，Trans = Area
+    Ratios = Area / 对应多边形的 Area，没有对应时为空
+几何均为表中 (纬度, 经度) 顺序，Center 与 Location 使用同样的顺序。
+
+用法: python change_detection.py [--source greenland3] [日期 ...]   不指定日期时重算全部日期
+"""
+import argparse
+
+import numpy as np
+import pymysql
+import shapely
+
+from geo_decode import extreme_indices
+from ingest_common import BatchWriter, write_config
+
+change_config = {
+    'source': 'greenland3',  # 提供几何和面积的入库表
+    'target': 'greenland6',  # API 读取的结果表
+    'summary': 'greenland_date_summary',  # 每个日期的汇总表
+    'cell_summary': 'greenland_cell_summary',  # 每个日期、每个网格单元的汇总表
+    'cell_size': 0.01  # 网格单元边长（度），修改后需不带日期重新运行本脚本重算全部日期
+}
+
+# 结果表的列及其占位符
+change_columns = {
+    'ID': '%s',
+    'Date': '%s',
+    'Area': '%s',
+    'Location': 'ST_GeomFromWKB(%s, 4326)',
+    'Center': 'ST_GeomFromWKB(%s, 4326)',
+    'Ratios': '%s',
+    'Trans': '%s'
+}
+
+# 网格汇总表的列
+cell_columns = {
+    'Date': '%s',
+    'CellRow': '%s',
+    'CellCol': '%s',
+    'PolygonCount': '%s',
+    'TotalArea': '%s',
+    'TotalTrans': '%s'
+}
+
+
+def load_date_polygons(cursor, table, date):
+    """
+    读取某日期的 (ID 数组, 面积数组, 几何数组)。
+    """
+    cursor.execute(f"SELECT ID, Area, ST_AsBinary(Location) FROM {table} WHERE Date = %s ORDER BY ID", (date,))
+    rows = cursor.fetchall()
+    geoms = shapely.from_wkb([row[2] for row in rows], on_invalid='ignore')
+    # 跳过无法解析的几何，修复无效几何以便求交
+    present = ~shapely.is_missing(geoms)
+    geoms = geoms[present]
+    invalid = ~shapely.is_valid(geoms)
+    geoms[invalid] = shapely.make_valid(geoms[invalid])
+    ids = np.array([row[0] for row in rows], dtype=np.int64)[present]
+    areas = np.array([row[1] for row in rows], dtype=np.float64)[present]
+    return ids, areas, geoms
+
+
+def neighbour_date(cursor, table, date, direction):
+    """
+    返回表中 date 之前（direction < 0）或之后（direction > 0）最近的日期，没有时返回 None。
+    """
+    if direction < 0:
+        cursor.execute(f"SELECT MAX(Date) FROM {table} WHERE Date < %s", (date,))
+    else:
+        cursor.execute(f"SELECT MIN(Date) FROM {table} WHERE Date > %s", (date,))
+    return cursor.fetchone()[0]
+
+
+def match_previous(geoms, previous_geoms):
+    """
+    为每个多边形找到相交面积最大的上一日期多边形，返回其下标数组（没有相交的为 -1）。
+    """
+    matches = np.full(len(geoms), -1, dtype=np.int64)
+    if not len(geoms) or not len(previous_geoms):
+        return matches
+    tree = shapely.STRtree(previous_geoms)
+    left, right = tree.query(geoms, predicate='intersects')
+    if not len(left):
+        return matches
+    overlap = shapely.area(shapely.intersection(geoms[left], previous_geoms[right]))
+    # 按 (多边形, 相交面积降序) 排序，每个多边形的第一条即为最佳对应
+    order = np.lexsort((-overlap, left))
+    first = order[np.r_[True, left[order][1:] != left[order][:-1]]]
+    matches[left[first]] = right[first]
+    return matches
+
+
+def compute_changes(areas, geoms, previous_areas, previous_geoms):
+    """
+    批量计算 (Trans 数组, Ratios 数组, 中心点几何数组)，Ratios 中没有对应的为 NaN。
+    """
+    matches = match_previous(geoms, previous_geoms)
+    matched = matches >= 0
+    previous = np.zeros(len(areas))
+    previous[matched] = previous_areas[matches[matched]]
+    trans = areas - previous
+    ratios = np.full(len(areas), np.nan)
+    valid = matched & (previous > 0)
+    ratios[valid] = areas[valid] / previous[valid]
+    return trans, ratios, shapely.centroid(geoms)
+
+
+def cell_totals(centers, areas, trans, cell_size):
+    """
+    按中心点所在的网格单元（纬度行、经度列）汇总，返回 (行号数组, 列号数组, 数量数组, 面积和数组, 面积变化和数组)。
+    """
+    present = ~shapely.is_empty(centers)  # 空几何没有中心点
+    coords = shapely.get_coordinates(centers[present])
+    areas, trans = areas[present], trans[present]
+    cells = np.floor(coords / cell_size).astype(np.int64)
+    keys, inverse = np.unique(cells, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    return (
+        keys[:, 0], keys[:, 1], np.bincount(inverse, minlength=len(keys)),
+        np.bincount(inverse, weights=areas, minlength=len(keys)), np.bincount(inverse, weights=trans, minlength=len(keys))
+    )
+
+
+def detect_date(cursor, date, config=change_config):
+    """
+    重算某日期的变化检测结果并写入结果表和汇总表，返回汇总信息。
+    """
+    ids, areas, geoms = load_date_polygons(cursor, config['source'], date)
+    previous_date = neighbour_date(cursor, config['source'], date, -1)
+    if previous_date is not None:
+        _, previous_areas, previous_geoms = load_date_polygons(cursor, config['source'], previous_date)
+    else:
+        previous_areas, previous_geoms = np.zeros(0), np.empty(0, dtype=object)
+
+    trans, ratios, centers = compute_changes(areas, geoms, previous_areas, previous_geoms)
+
+    cursor.execute(f"DELETE FROM {config['target']} WHERE Date = %s", (date,))
+    writer = BatchWriter(cursor, config['target'], write_config['batch_size'], columns=change_columns)
+    location_wkbs = shapely.to_wkb(geoms)
+    center_wkbs = shapely.to_wkb(centers)
+    for i in range(len(ids)):
+        writer.add(
+            int(ids[i]), date, float(areas[i]), location_wkbs[i], center_wkbs[i],
+            None if np.isnan(ratios[i]) else float(ratios[i]), float(trans[i])
+        )
+    writer.flush()
+
+    cursor.execute(f"DELETE FROM {config['cell_summary']} WHERE Date = %s", (date,))
+    writer = BatchWriter(cursor, config['cell_summary'], write_config['batch_size'], columns=cell_columns)
+    for row, col, count, area, change in zip(*(values.tolist() for values in cell_totals(
+            centers, areas, trans, config['cell_size']))):
+        writer.add(date, row, col, count, area, change)
+    writer.flush()
+
+    max_index, min_index = extreme_indices(trans)
+    summary = {
+        'Date': date,
+        'PolygonCount': len(ids),
+        'TotalArea': float(areas.sum()),
+        'TotalTrans': float(trans.sum()),
+        'MaxIncreaseID': None if max_index is None else int(ids[max_index]),
+        'MaxIncrease': None if max_index is None else float(trans[max_index]),
+        'MaxDecreaseID': None if min_index is None else int(ids[min_index]),
+        'MaxDecrease': None if min_index is None else float(trans[min_index]),
+        'PreviousDate': previous_date
+    }
+    cursor.execute(
+        f"REPLACE INTO {config['summary']} ({', '.join(summary)}) VALUES ({', '.join(['%s'] * len(summary))})",
+        tuple(summary.values())
+    )
+    return summary
+
+
+def update_change_detection(connection, dates=None, config=change_config):
+    """
+    对指定日期（None 表示全部日期）重算变化检测。每个日期的下一个日期以它为基准，也一并重算。
+    """
+    with connection.cursor() as cursor:
+        if dates is None:
+            cursor.execute(f"SELECT DISTINCT Date FROM {config['source']} ORDER BY Date")
+            pending = {str(row[0]) for row in cursor.fetchall()}
+        else:
+            pending = {str(date) for date in dates}
+            for date in list(pending):
+                following = neighbour_date(cursor, config['source'], date, 1)
+                if following is not None:
+                    pending.add(str(following))
+
+        for date in sorted(pending):
+            summary = detect_date(cursor, date, config)
+            connection.commit()
+            print(
+                f"变化检测完成: Date={date}, 多边形 {summary['PolygonCount']} 个, 上一日期={summary['PreviousDate']}, "
+                f"最大增加 ID={summary['MaxIncreaseID']}, 最大减少 ID={summary['MaxDecreaseID']}"
+            )
+    return pending
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='重算 greenland6 的面积变化、面积比和中心点')
+    parser.add_argument('dates', nargs='*', help='要重算的日期（YYYY-MM-DD），不指定时重算全部日期')
+    parser.add_argument('--source', default=change_config['source'], help='入库表')
+    args = parser.parse_args()
+
+    # 数据库配置
+    connection = pymysql.connect(
+        host='192.168.0.14',
+        user='root',
+        password='0601',
+        database='yaogan',
+        charset='utf8mb4'
+    )
+    try:
+        update_change_detection(connection, args.dates or None, dict(change_config, source=args.source))
+    finally:
+        connection.close()
@@ -0,0 +1,340 @@
+"""
+掩膜 PNG 的轮廓提取。
+
+整幅模式一次读入整张图；分块模式按行带（整行宽、若干行高）窗口读取，逐块提取轮廓，
+相邻行带共享一行像素，跨越分块边界的轮廓片段在全部分块处理完后合并，再统一简化。
+
+两个入库脚本都通过 extract_mask_polygons 调用，按 raster_config 选择：
+    - 二值化后用连通域统计去掉像素数或外包框过小的斑块，不再为噪点提取、简化和地理配准轮廓；
+    - 整幅模式下先把掩膜裁剪到边界外包框对应的像素窗口，窗口外的像素不参与后续任何步骤；
+    - 整幅模式下可用 RETR_CCOMP 保留多边形内部的洞。
+"""
+import cv2
+import numpy as np
+import shapely
+
+from georef import build_polygons, contours_to_geo, flatten_contours, pixel_window
+from metrics import StageTimer
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+except ImportError:  # 可选依赖，未安装时读入整张图后再分块，轮廓提取仍按块进行
+    rasterio = None
+
+# approxPolyDP 简化容差（相对轮廓周长）
+SIMPLIFY_RATIO = 0.0025
+# 二值化后高斯模糊的核大小，分块时每块上下各多读 BLUR_KERNEL // 2 行，保证与整幅处理结果一致
+BLUR_KERNEL = 5
+
+
+def filter_small_blobs(binary_image, min_pixels=0, min_extent=0, protect_edges=()):
+    """
+    去掉像素数小于 min_pixels 或外包框长边小于 min_extent 像素的 8 连通斑块（非零像素）。
+    protect_edges 为 'top' / 'bottom' / 'left' / 'right' 的组合，接触这些边的斑块可能延续到窗口之外，一律保留。
+    """
+    if min_pixels <= 1 and min_extent <= 1:
+        return binary_image
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(binary_image, connectivity=8)
+    left, top = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+    width, height = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+    keep = (stats[:, cv2.CC_STAT_AREA] >= min_pixels) & (np.maximum(width, height) >= min_extent)
+    rows, cols = binary_image.shape
+    edges = {
+        'top': top == 0, 'bottom': top + height == rows,
+        'left': left == 0, 'right': left + width == cols
+    }
+    for edge in protect_edges:
+        keep |= edges[edge]
+    keep[0] = False  # 背景
+    if keep[1:].all():
+        return binary_image
+    lookup = np.where(keep, 255, 0).astype(np.uint8)
+    return cv2.bitwise_and(binary_image, lookup[labels])
+
+
+def binarize(image, blur=False, min_pixels=0, min_extent=0, protect_edges=(), timer=None):
+    """
+    二值化（阈值 127），blur=True 时再做一次高斯模糊去噪，最后按 min_pixels / min_extent 去掉小斑块。
+    斑块按 findContours 实际看到的非零区域（模糊之后）统计，过滤只会整块去掉轮廓，不改变其余轮廓。
+    timer 为 StageTimer 时二值化和模糊记为 threshold 阶段，斑块过滤记为 blob_filter 阶段。
+    """
+    timer = timer or StageTimer()
+    with timer.stage('threshold'):
+        _, binary_image = cv2.threshold(image, 127, 255, cv2.THRESH_BINARY)
+        if blur:
+            binary_image = cv2.GaussianBlur(binary_image, (BLUR_KERNEL, BLUR_KERNEL), 0)
+    if min_pixels > 1 or min_extent > 1:
+        with timer.stage('blob_filter'):
+            binary_image = filter_small_blobs(binary_image, min_pixels, min_extent, protect_edges)
+    return binary_image
+
+
+def simplify_contours(contours):
+    """
+    用 approxPolyDP 简化轮廓，只保留至少 3 个顶点的轮廓。
+    """
+    simplified_contours = []
+    for contour in contours:
+        epsilon = SIMPLIFY_RATIO * cv2.arcLength(contour, True)
+        simplified_contour = cv2.approxPolyDP(contour, epsilon, True)
+        if len(simplified_contour) >= 3:
+            simplified_contours.append(simplified_contour)
+    return simplified_contours
+
+
+def simplify_contours_with_holes(contours, holes):
+    """
+    同时简化外轮廓和其中的洞，外轮廓被丢弃时其洞一并丢弃，洞少于 3 个顶点时单独丢弃。
+    """
+    simplified_contours, simplified_holes = [], []
+    for contour, contour_holes in zip(contours, holes):
+        simplified = simplify_contours([contour])
+        if simplified:
+            simplified_contours.append(simplified[0])
+            simplified_holes.append(simplify_contours(contour_holes))
+    return simplified_contours, simplified_holes
+
+
+def mask_shape(png_path):
+    """
+    返回掩膜的 (高, 宽)，不解码像素。
+    """
+    if rasterio is not None:
+        with rasterio.open(png_path) as src:
+            return src.height, src.width
+    image = cv2.imread(png_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError(f"无法加载 PNG 文件: {png_path}")
+    return image.shape
+
+
+def _read_bands(png_path, band_rows, halo):
+    """
+    依次产出 (起始行, 块数据, 上方多读的行数)，块覆盖 [起始行, 起始行 + band_rows + 1) 行（与下一块共享一行），
+    上下各多读 halo 行供模糊使用。
+    """
+    if rasterio is not None:
+        with rasterio.open(png_path) as src:
+            height, width = src.height, src.width
+            for row_off in range(0, height, band_rows):
+                top = max(row_off - halo, 0)
+                bottom = min(row_off + band_rows + 1 + halo, height)
+                band = src.read(1, window=Window(0, top, width, bottom - top))
+                yield row_off, band, row_off - top
+        return
+
+    image = cv2.imread(png_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError(f"无法加载 PNG 文件: {png_path}")
+    height = image.shape[0]
+    for row_off in range(0, height, band_rows):
+        top = max(row_off - halo, 0)
+        bottom = min(row_off + band_rows + 1 + halo, height)
+        yield row_off, image[top:bottom], row_off - top
+
+
+def _stitch(pieces):
+    """
+    合并跨分块边界的原始轮廓片段，返回合并后各多边形外环对应的 OpenCV 轮廓。
+    """
+    pieces = [piece for piece in pieces if len(piece) >= 3]
+    if not pieces:
+        return []
+    polygons = shapely.make_valid(build_polygons(*flatten_contours(pieces)))
+    # 只落在共享行上的片段面积为 0，其像素已包含在相邻块的片段中
+    polygons = polygons[shapely.area(polygons) > 0]
+    if not len(polygons):
+        return []
+    merged = shapely.get_parts(shapely.union_all(polygons))
+    merged = merged[shapely.get_type_id(merged) == shapely.GeometryType.POLYGON]
+    contours = []
+    for polygon in merged:
+        coords = shapely.get_coordinates(polygon.exterior)[:-1]
+        contours.append(np.rint(coords).astype(np.int32).reshape(-1, 1, 2))
+    return contours
+
+
+def _touches_edges(contours, shape, edges):
+    """
+    返回每个轮廓是否接触 edges 中任一图像边的布尔数组。
+    """
+    touches = np.zeros(len(contours), dtype=bool)
+    if not len(contours) or not edges:
+        return touches
+    coords, offsets = flatten_contours(contours)
+    starts = offsets[:-1]
+    low = np.minimum.reduceat(coords, starts)
+    high = np.maximum.reduceat(coords, starts)
+    checks = {
+        'top': low[:, 1] == 0, 'bottom': high[:, 1] == shape[0] - 1,
+        'left': low[:, 0] == 0, 'right': high[:, 0] == shape[1] - 1
+    }
+    for edge in edges:
+        touches |= checks[edge]
+    return touches
+
+
+def extract_contours(image, blur=False, timer=None, min_pixels=0, min_extent=0, cut_edges=()):
+    """
+    整幅模式：对整张灰度图提取外轮廓并简化。timer 为 StageTimer 时记录 threshold / contours / simplify 各阶段耗时。
+    image 为裁剪后的子图时，cut_edges 为被裁掉的边，接触这些边的斑块延续到子图之外，不做斑块过滤，其轮廓直接丢弃。
+    """
+    timer = timer or StageTimer()
+    binary_image = binarize(image, blur, min_pixels, min_extent, cut_edges, timer)
+    with timer.stage('contours'):
+        contours, _ = cv2.findContours(binary_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if cut_edges:
+            touches = _touches_edges(contours, image.shape, cut_edges)
+            contours = [contour for contour, touch in zip(contours, touches) if not touch]
+    with timer.stage('simplify'):
+        return simplify_contours(contours)
+
+
+def extract_contours_with_holes(image, blur=False, timer=None, min_pixels=0, min_extent=0, cut_edges=()):
+    """
+    整幅模式，用 RETR_CCOMP 同时提取外轮廓和洞，返回 (外轮廓列表, 与之对应的洞轮廓列表的列表)。
+    洞内的斑块在两层结构中也是外轮廓，与 RETR_EXTERNAL 相比会多出这些“岛”。cut_edges 同 extract_contours。
+    """
+    timer = timer or StageTimer()
+    binary_image = binarize(image, blur, min_pixels, min_extent, cut_edges, timer)
+    with timer.stage('contours'):
+        contours, hierarchy = cv2.findContours(binary_image, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+        outer = []
+        holes = {}
+        if hierarchy is not None:
+            touches = _touches_edges(contours, image.shape, cut_edges)
+            for index, (_, _, _, parent) in enumerate(hierarchy[0]):
+                if parent < 0 and not touches[index]:
+                    outer.append(index)
+                else:
+                    holes.setdefault(parent, []).append(contours[index])
+    with timer.stage('simplify'):
+        return simplify_contours_with_holes([contours[i] for i in outer], [holes.get(i, []) for i in outer])
+
+
+def extract_contours_tiled(png_path, max_tile_pixels, blur=False, timer=None, min_pixels=0, min_extent=0):
+    """
+    分块模式：每块最多约 max_tile_pixels 个像素，峰值内存与块大小而非整图大小成正比。
+    返回与整幅模式相同格式的简化轮廓（全图像素坐标）；timer 另外记录读块（imread）的耗时，跨块合并计入 contours。
+    斑块过滤按块进行，接触块内部边界的斑块可能延续到相邻块，一律保留。
+    """
+    timer = timer or StageTimer()
+    height, width = mask_shape(png_path)
+    band_rows = max(1, max_tile_pixels // width - 1)
+    halo = BLUR_KERNEL // 2 if blur else 0
+
+    simplified_contours = []
+    border_pieces = []
+    bands = _read_bands(png_path, band_rows, halo)
+    while True:
+        with timer.stage('imread'):
+            item = next(bands, None)
+        if item is None:
+            break
+        row_off, band, top_halo = item
+        rows = min(band_rows + 1, height - row_off)
+        protect_edges = [edge for edge, inside in (('top', row_off > 0), ('bottom', row_off + rows < height)) if inside]
+        binary_band = binarize(band, blur, min_pixels, min_extent, protect_edges, timer)
+        binary_band = np.ascontiguousarray(binary_band[top_halo:top_halo + rows])
+        with timer.stage('contours'):
+            contours, _ = cv2.findContours(binary_band, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        inner = []
+        for contour in contours:
+            ys = contour[:, 0, 1]
+            # 接触块内部边界（非图像边缘）的轮廓可能延续到相邻块，留待合并
+            touches_top = row_off > 0 and ys.min() == 0
+            touches_bottom = row_off + rows < height and ys.max() == rows - 1
+            contour = contour + np.array([0, row_off], dtype=contour.dtype)
+            if touches_top or touches_bottom:
+                border_pieces.append(contour)
+            else:
+                inner.append(contour)
+        with timer.stage('simplify'):
+            simplified_contours.extend(simplify_contours(inner))
+
+    with timer.stage('contours'):
+        stitched = _stitch(border_pieces)
+    with timer.stage('simplify'):
+        simplified_contours.extend(simplify_contours(stitched))
+    return simplified_contours
+
+
+def _crop_to_bounds(image, affine, bounds, blur):
+    """
+    把整幅掩膜裁剪到地理外包框 bounds 对应的像素窗口，返回 (子图, 子图左上角的 (列, 行) 偏移, 被裁掉的边)；
+    窗口四周多留一圈像素（模糊时再多留 BLUR_KERNEL // 2 行列），使外包框内的像素二值化、模糊结果与整幅处理一致；
+    接触被裁掉的边的斑块延续到窗口之外，不可能完全位于外包框内。与图像不相交时子图为 None。
+
+    与整幅处理的唯一区别：跨越窗口边的斑块被截断后，其洞可能与窗口外连通，洞中的斑块会作为独立的外轮廓提取出来，
+    而整幅处理时它们被外层斑块包住、随外层斑块一起被边界筛选去掉。
+    """
+    height, width = image.shape
+    margin = (BLUR_KERNEL // 2 if blur else 0) + 1
+    window = pixel_window(affine, bounds, height, width, margin)
+    if window is None:
+        return None, (0, 0), ()
+    row_start, row_stop, col_start, col_stop = window
+    cut_edges = [edge for edge, cut in (
+        ('top', row_start > 0), ('bottom', row_stop < height), ('left', col_start > 0), ('right', col_stop < width)
+    ) if cut]
+    crop = np.ascontiguousarray(image[row_start:row_stop, col_start:col_stop])
+    return crop, (col_start, row_start), cut_edges
+
+
+def extract_mask_polygons(png_path, affine_for_shape, blur=False, config=None, boundary_bounds=None, timer=None):
+    """
+    两个入库脚本共用的提取流程：读掩膜、（可选）裁剪到边界窗口、二值化并过滤小斑块、提取并简化轮廓，
+    最后批量转换为地理坐标多边形，返回 (经度, 纬度) 顺序的有效多边形数组。
+
+    affine_for_shape(高, 宽) 返回整幅掩膜的仿射参数；config 为 ingest_common.raster_config 格式的字典；
+    boundary_bounds 为调用方随后筛选用的边界外包框，只有完全位于其中的多边形会被保留时才能传入。
+    裁剪和保留洞只作用于整幅模式，分块模式按块过滤斑块，仍只提取外轮廓。
+    PNG 无法读取时抛出 ValueError。
+    """
+    config = config or {}
+    timer = timer or StageTimer()
+    min_pixels = config.get('min_blob_pixels', 0)
+    min_extent = config.get('min_blob_extent', 0)
+    holes = None
+
+    if config.get('tiled'):
+        # 分块读取 PNG 并逐块提取轮廓，峰值内存由 max_tile_pixels 控制
+        img_height, img_width = mask_shape(png_path)
+        print(f"分块处理 PNG 文件，尺寸: {(img_height, img_width)}")
+        contours = extract_contours_tiled(
+            png_path, config['max_tile_pixels'], blur, timer, min_pixels, min_extent
+        )
+        affine = affine_for_shape(img_height, img_width)
+    else:
+        with timer.stage('imread'):
+            image = cv2.imread(png_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"无法加载 PNG 文件: {png_path}")
+        print(f"加载 PNG 文件成功，尺寸: {image.shape}")
+        affine = affine_for_shape(*image.shape)
+
+        offset, cut_edges = (0, 0), ()
+        if boundary_bounds is not None and config.get('crop_to_boundary'):
+            with timer.stage('crop'):
+                image, offset, cut_edges = _crop_to_bounds(image, affine, boundary_bounds, blur)
+            if image is None:
+                print("掩膜与边界外包框不相交")
+                return np.empty(0, dtype=object)
+
+        if config.get('keep_holes'):
+            contours, holes = extract_contours_with_holes(image, blur, timer, min_pixels, min_extent, cut_edges)
+        else:
+            contours = extract_contours(image, blur, timer, min_pixels, min_extent, cut_edges)
+
+        if offset != (0, 0):
+            # 换回整幅掩膜的像素坐标，仿射变换与不裁剪时完全相同
+            shift = np.array(offset, dtype=np.int32)
+            contours = [contour + shift for contour in contours]
+            if holes is not None:
+                holes = [[hole + shift for hole in contour_holes] for contour_holes in holes]
+
+    # 所有轮廓一次完成仿射变换并批量构造多边形，只保留有效的多边形
+    with timer.stage('georeference'):
+        return contours_to_geo(contours, affine, holes)
@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+
+
+class PoolTimeout(Exception):
+    """
+    等待空闲连接超时。
+    """
+
+
+class ConnectionPool:
+    """
+    有界、线程安全的 MySQL 连接池，所有路由共享同一个实例。
+
+    - max_size: 同时存在的最大连接数
+    - max_idle: 连接空闲超过该秒数后在取出时丢弃并重建
+    - checkout_timeout: 连接池耗尽时等待空闲连接的最长秒数
+    - ping_interval: 空闲超过该秒数的连接在取出时先 ping 一次做健康检查
+    - on_acquire: 可选回调，connection() 每次取到连接后以取连接耗时（秒，含等待、建连和健康检查）调用
+    """
+
+    def __init__(self, db_config, max_size=10, max_idle=300, checkout_timeout=10, ping_interval=5):
+        self.db_config = db_config
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.checkout_timeout = checkout_timeout
+        self.ping_interval = ping_interval
+        self.on_acquire = None
+
+        self._idle = deque()  # (connection, 归还时间)
+        self._size = 0
+        self._cond = threading.Condition()
+
+        # 连接池指标
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+
+    def _connect(self):
+        connection = pymysql.connect(**self.db_config)
+        with self._cond:
+            self._created += 1
+        return connection
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._discarded += 1
+            self._cond.notify()
+
+    def _is_healthy(self, connection, idle_for):
+        """
+        取出时的健康检查：超过最大空闲时间直接丢弃，空闲较久的连接先 ping。
+        """
+        if idle_for > self.max_idle:
+            return False
+        if idle_for > self.ping_interval:
+            try:
+                connection.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def acquire(self):
+        """
+        取出一个可用连接；连接池满时阻塞等待，超时抛出 PoolTimeout。
+        """
+        deadline = None
+        waited_from = None
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    now = time.monotonic()
+                    if waited_from is None:
+                        waited_from = now
+                        deadline = now + self.checkout_timeout
+                        self._waits += 1
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        self._wait_time += now - waited_from
+                        raise PoolTimeout(f"等待数据库连接超时 ({self.checkout_timeout}s)")
+                    self._cond.wait(remaining)
+
+                if waited_from is not None:
+                    self._wait_time += time.monotonic() - waited_from
+                    waited_from = None
+
+                if self._idle:
+                    connection, released_at = self._idle.pop()
+                else:
+                    connection, released_at = None, None
+                    self._size += 1
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(connection, time.monotonic() - released_at):
+                self._discard(connection)
+                continue
+
+            with self._cond:
+                self._in_use += 1
+                self._checkouts += 1
+            return connection
+
+    def release(self, connection, broken=False):
+        """
+        归还连接；出错的连接（broken=True）直接关闭，不再放回池中。
+        """
+        with self._cond:
+            self._in_use -= 1
+        if broken or not connection.open:
+            self._discard(connection)
+            return
+        try:
+            # 丢弃未提交的事务，避免脏状态被下一个请求复用
+            connection.rollback()
+        except Exception:
+            self._discard(connection)
+            return
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        with pool.connection() as connection: ... 自动归还连接。
+        """
+        started = time.perf_counter()
+        connection = self.acquire()
+        if self.on_acquire is not None:
+            self.on_acquire(time.perf_counter() - started)
+        broken = False
+        try:
+            yield connection
+        except pymysql.MySQLError:
+            broken = True
+            raise
+        finally:
+            self.release(connection, broken=broken)
+
+    def close(self):
+        """
+        关闭所有空闲连接。
+        """
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for connection, _ in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        """
+        返回连接池指标快照。
+        """
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': round(self._wait_time, 6),
+                'wait_time_avg': round(self._wait_time / self._waits, 6) if self._waits else 0.0,
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'discarded': self._discarded
+            }
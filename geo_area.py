@@ -0,0 +1,46 @@
+"""
+多边形面积的批量计算。
+
+一个场景的所有几何一次性投影（shapely.transform 把全部坐标作为一个数组交给 pyproj），再由 shapely.area 批量求面积。
+    equal_area  EPSG:6933（WGS 84 等积圆柱投影），面积无变形
+    mercator    EPSG:3857（Web 墨卡托），与历史数据的 Area 口径一致，深圳纬度下面积约偏大 18%，入库默认使用
+"""
+import numpy as np
+import pyproj
+import shapely
+
+AREA_CRS = {
+    'equal_area': 'EPSG:6933',
+    'mercator': 'EPSG:3857'
+}
+
+_transformers = {}
+
+
+def _transformer(method):
+    transformer = _transformers.get(method)
+    if transformer is None:
+        if method not in AREA_CRS:
+            raise ValueError(f"Unsupported area method: {method}")
+        transformer = _transformers[method] = pyproj.Transformer.from_crs(
+            "EPSG:4326", AREA_CRS[method], always_xy=True
+        )
+    return transformer
+
+
+def project_coords(coords, method='equal_area'):
+    """
+    把 (N, 2) 的 (经度, 纬度) 坐标数组整体投影到面积计算用的坐标系。
+    """
+    x, y = _transformer(method).transform(coords[:, 0], coords[:, 1])
+    return np.column_stack([x, y])
+
+
+def polygon_areas(geoms, method='equal_area'):
+    """
+    批量计算 (经度, 纬度) 顺序几何的面积（平方米），返回与 geoms 等长的数组。
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    if not len(geoms):
+        return np.zeros(0)
+    return shapely.area(shapely.transform(geoms, lambda coords: project_coords(coords, method)))
@@ -0,0 +1,198 @@
+import gc
+import math
+from contextlib import contextmanager
+
+import numpy as np
+import shapely
+
+from metrics import stage
+
+
+@contextmanager
+def gc_paused():
+    """
+    批量创建大量坐标列表时暂停循环垃圾回收：这些对象不会形成引用环，
+    否则分代 GC 会被反复触发并扫描整批新对象。
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def decode_wkt(rows, wkt_field):
+    """
+    批量把行字典中的 WKT 字段解析为 Shapely 几何数组，跳过无效 WKT。
+    解析耗时计入当前请求的 decode 阶段。
+
+    返回 (有效行列表, 几何数组)，两者一一对应。
+    """
+    wkts = [row[wkt_field] for row in rows]
+    if not wkts:
+        return [], np.empty(0, dtype=object)
+
+    with stage('decode'), gc_paused():
+        geoms = shapely.from_wkt(wkts, on_invalid='ignore')
+    valid = ~shapely.is_missing(geoms)
+    if valid.all():
+        return list(rows), geoms
+
+    for row, ok in zip(rows, valid):
+        if not ok:
+            print(f"Invalid WKT format for ID {row['ID']}")
+    return [row for row, ok in zip(rows, valid) if ok], geoms[valid]
+
+
+def exterior_coords(geoms, decimals=None):
+    """
+    一次性取出所有多边形外环坐标，返回每个多边形的 [[x, y], ...] 列表。
+
+    decimals 不为空时把坐标量化到对应的小数位数。
+    """
+    if len(geoms) == 0:
+        return []
+
+    rings = shapely.get_exterior_ring(geoms)
+    coords = shapely.get_coordinates(rings)
+    if decimals is not None:
+        coords = np.round(coords, decimals)
+    coords = coords.tolist()
+    ends = np.cumsum(shapely.get_num_coordinates(rings)).tolist()
+
+    result = []
+    start = 0
+    for end in ends:
+        result.append(coords[start:end])
+        start = end
+    return result
+
+
+def zoom_level(zoom):
+    """
+    按 Web 墨卡托瓦片缩放级别计算简化容差（半个像素对应的度数）和量化小数位数。
+    """
+    return tolerance_level(360.0 / (256 * 2 ** zoom) / 2)
+
+
+def tolerance_level(tolerance):
+    """
+    按简化容差（度）计算几何输出级别：小数位数取到比容差再精细一位。
+    """
+    decimals = min(max(math.ceil(-math.log10(tolerance)) + 1, 0), 10)
+    return {'tolerance': tolerance, 'decimals': decimals}
+
+
+def simplify_geoms(geoms, level):
+    """
+    按级别做保持拓扑的简化；level 为空时原样返回。
+    """
+    if level is None or len(geoms) == 0:
+        return geoms
+    return shapely.simplify(geoms, level['tolerance'], preserve_topology=True)
+
+
+def extreme_indices(values):
+    """
+    返回 (最大值下标, 最小值下标)，忽略空值；没有有效值时返回 (None, None)。
+
+    与逐行比较一致，出现并列时取第一条。
+    """
+    values = np.array(values, dtype=float)  # None 转为 NaN
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return None, None
+    return (
+        int(np.argmax(np.where(valid, values, -np.inf))),
+        int(np.argmin(np.where(valid, values, np.inf)))
+    )
+
+
+# 各接口可输出的字段（fields 参数可选其子集）
+DATE_FIELDS = ('ID', 'Date', 'Area', 'Coordinates', 'Change', 'Center', 'Ratios')
+AREA_FIELDS = ('ID', 'Date', 'Area', 'Coordinates')
+
+# 输出字段对应的查询结果列（Coordinates 来自几何对象）
+record_columns = {
+    'ID': 'ID',
+    'Date': 'Date',
+    'Area': 'Area',
+    'Change': 'Trans',  # 使用Trans作为面积变化
+    'Center': 'Center_WKT',
+    'Ratios': 'Ratios'
+}
+
+
+def select_records(rows, geoms, fields, level=None):
+    """
+    按 fields 只输出需要的字段；不需要 Coordinates 时 geoms 可以为 None。
+    """
+    columns = [(field, record_columns[field]) for field in fields if field != 'Coordinates']
+    with gc_paused():
+        records = [{field: row[column] for field, column in columns} for row in rows]
+        if 'Coordinates' in fields:
+            coordinates = exterior_coords(simplify_geoms(geoms, level), level and level['decimals'])
+            for record, coords in zip(records, coordinates):
+                record['Coordinates'] = coords
+    return records
+
+
+def date_records(rows, geoms, fields=None, level=None):
+    """
+    生成 /api/coordinates 的多边形记录列表；level 为简化/量化级别（见 zoom_level）。
+    """
+    if fields is not None:
+        return select_records(rows, geoms, fields, level)
+
+    with gc_paused():
+        coordinates = exterior_coords(simplify_geoms(geoms, level), level and level['decimals'])
+        return [
+            {
+                'ID': row['ID'],
+                'Date': row['Date'],
+                'Area': row['Area'],
+                'Coordinates': coords,
+                'Change': row['Trans'],  # 使用Trans作为面积变化
+                'Center': row['Center_WKT'],
+                'Ratios': row['Ratios']
+            }
+            for row, coords in zip(rows, coordinates)
+        ]
+
+
+def area_records(rows, geoms, fields=None):
+    """
+    生成 /api/coordinates_in_area 的多边形记录列表。
+    """
+    if fields is not None:
+        return select_records(rows, geoms, fields)
+
+    with gc_paused():
+        return [
+            {
+                'ID': row['ID'],
+                'Date': row['Date'],
+                'Area': row['Area'],
+                'Coordinates': coords
+            }
+            for row, coords in zip(rows, exterior_coords(geoms))
+        ]
+
+
+def assemble_date_result(rows, geoms, level=None):
+    """
+    组装 /api/coordinates 的返回结构：所有多边形只生成一次记录，
+    面积变化最大/最小的记录按下标直接引用。
+    """
+    parsed_results = date_records(rows, geoms, level=level)
+
+    # 计算面积变化最大和最小的多边形
+    max_index, min_index = extreme_indices([row['Trans'] for row in rows])
+
+    return {
+        'all_polygons': parsed_results,
+        'max_increase_record': parsed_results[max_index] if max_index is not None else None,
+        'max_decrease_record': parsed_results[min_index] if min_index is not None else None
+    }
@@ -0,0 +1,115 @@
+"""
+像素坐标到地理坐标的批量仿射变换。
+
+一个场景的所有轮廓拼成一个扁平的 (N, 2) 坐标数组，配合 offsets（第 i 个轮廓为 coords[offsets[i]:offsets[i + 1]]）
+一次完成仿射变换，再用 shapely 2.0 的批量构造函数生成几何。
+仿射参数统一为 JGW 的 (A, B, C, D, E, F)：
+    x = A * col + B * row + C
+    y = D * col + E * row + F
+"""
+import numpy as np
+import shapely
+
+
+def affine_from_bounds(geo_bounds, img_width, img_height):
+    """
+    由 JSON 中四个角点构成的地理边界和图像尺寸得到仿射参数（Y 轴反转）。
+    """
+    min_lon, min_lat, max_lon, max_lat = geo_bounds.bounds
+    lon_per_pixel = (max_lon - min_lon) / img_width
+    lat_per_pixel = (max_lat - min_lat) / img_height
+    return lon_per_pixel, 0.0, min_lon, 0.0, -lat_per_pixel, max_lat
+
+
+def affine_from_jgw(jgw_params):
+    """
+    由 parse_jgw 的结果得到仿射参数。
+    """
+    return (
+        jgw_params["pixel_width"], jgw_params["rotation_x"], jgw_params["top_left_x"],
+        jgw_params["rotation_y"], jgw_params["pixel_height"], jgw_params["top_left_y"]
+    )
+
+
+def apply_affine(coords, affine):
+    """
+    对 (N, 2) 像素坐标数组整体应用仿射变换，返回 (经度, 纬度) 顺序的坐标数组。
+    """
+    a, b, c, d, e, f = affine
+    matrix = np.array([[a, d], [b, e]])
+    return np.asarray(coords, dtype=np.float64) @ matrix + (c, f)
+
+
+def pixel_window(affine, bounds, img_height, img_width, margin=0):
+    """
+    地理外包框 (min_x, min_y, max_x, max_y) 覆盖的像素窗口 (row_start, row_stop, col_start, col_stop)，
+    四周外扩 margin 像素并裁到图像范围内；与图像不相交时返回 None。
+    """
+    a, b, c, d, e, f = affine
+    corners = np.array([(x, y) for x in (bounds[0], bounds[2]) for y in (bounds[1], bounds[3])]) - (c, f)
+    cols, rows = np.linalg.solve(np.array([[a, b], [d, e]]), corners.T)
+    row_start = max(int(np.floor(rows.min())) - margin, 0)
+    row_stop = min(int(np.ceil(rows.max())) + 1 + margin, img_height)
+    col_start = max(int(np.floor(cols.min())) - margin, 0)
+    col_stop = min(int(np.ceil(cols.max())) + 1 + margin, img_width)
+    if row_start >= row_stop or col_start >= col_stop:
+        return None
+    return row_start, row_stop, col_start, col_stop
+
+
+def flatten_contours(contours):
+    """
+    把 OpenCV 轮廓列表（每个为 (n, 1, 2) 数组）拼成扁平坐标数组和偏移量。
+    """
+    counts = np.array([len(contour) for contour in contours], dtype=np.int64)
+    offsets = np.zeros(len(contours) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    if not len(contours):
+        return np.zeros((0, 2)), offsets
+    coords = np.concatenate([contour.reshape(-1, 2) for contour in contours]).astype(np.float64)
+    return coords, offsets
+
+
+def build_polygons(coords, offsets, polygon_ids=None):
+    """
+    按偏移量批量构造多边形（环自动闭合）。
+    polygon_ids 给出每个环所属的多边形编号，同一多边形的第一个环为外环、其余为洞；为空时每个环单独成一个多边形。
+    """
+    if len(offsets) <= 1:
+        return np.empty(0, dtype=object)
+    ring_ids = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    rings = shapely.linearrings(coords, indices=ring_ids)
+    if polygon_ids is None:
+        return shapely.polygons(rings)
+    return shapely.polygons(rings, indices=polygon_ids)
+
+
+def contours_to_geo(contours, affine, holes=None):
+    """
+    把一个场景的所有轮廓一次性转换为地理坐标多边形，只保留有效的多边形。
+    holes 不为空时与 contours 一一对应，为每个外轮廓内部的洞轮廓列表。
+    """
+    polygon_ids = None
+    if holes is not None:
+        rings = []
+        polygon_ids = []
+        for index, (contour, contour_holes) in enumerate(zip(contours, holes)):
+            rings.append(contour)
+            rings.extend(contour_holes)
+            polygon_ids.extend([index] * (1 + len(contour_holes)))
+        contours = rings
+        polygon_ids = np.array(polygon_ids, dtype=np.int64)
+    coords, offsets = flatten_contours(contours)
+    polygons = build_polygons(apply_affine(coords, affine), offsets, polygon_ids)
+    if holes is not None:
+        # 简化后洞与外环相交时去掉该多边形的洞，而不是整个丢弃
+        invalid = ~shapely.is_valid(polygons)
+        polygons[invalid] = shapely.polygons(shapely.get_exterior_ring(polygons[invalid]))
+    return polygons[shapely.is_valid(polygons)]
+
+
+def swap_axes(geoms):
+    """
+    批量把 (经度, 纬度) 顺序的几何调整为表中使用的 (纬度, 经度) 顺序。
+    """
+    return shapely.transform(geoms, lambda coords: coords[:, ::-1])
@@ -0,0 +1,395 @@
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pymysql
+import shapely
+
+from geo_area import polygon_areas
+from georef import swap_axes
+from ingest_manifest import IngestManifest, scene_fingerprint
+from metrics import Counter, Histogram, StageTimer
+from polygon_dedupe import PolygonDeduper
+
+# API 缓存失效接口地址，入库完成后通知后端丢弃对应日期的缓存
+api_invalidate_url = 'http://127.0.0.1:5000/api/cache/invalidate'
+# API 瓦片预生成接口地址
+api_tile_seed_url = 'http://127.0.0.1:5000/tiles/{date}/seed'
+
+# 入库指标，常驻入库服务设置 watch_config['metrics_port'] 后通过 /metrics 导出
+ingest_stage_seconds = Histogram('yaogan_ingest_stage_seconds', '入库时每个场景各阶段的耗时（秒）', ('table', 'stage'))
+ingest_scenes_total = Counter('yaogan_ingest_scenes_total', '已处理的场景数', ('table', 'status'))
+ingest_rows_total = Counter('yaogan_ingest_rows_total', '已写入的行数', ('table',))
+
+# 入库写入参数
+write_config = {
+    'batch_size': 1000,  # 每条多行 INSERT 包含的记录数
+    'commit_every': 50000  # 每写入多少行提交一次事务，None 表示只在结束时提交
+}
+
+# 入库表的列及其占位符，几何以 WKB 参数传递
+polygon_columns = {
+    'ID': '%s',
+    'Date': '%s',
+    'Area': '%s',
+    'Location': 'ST_GeomFromWKB(%s, 4326)'
+}
+
+# 掩膜读取和轮廓提取方式，见 contour_extraction.extract_mask_polygons：
+# tiled=True 时按窗口分块读取并提取轮廓，适合全分辨率大图，
+# max_tile_pixels 为每块的像素上限，决定每个工作进程的峰值内存
+raster_config = {
+    'tiled': False,
+    'max_tile_pixels': 16 * 1024 * 1024,
+    'min_blob_pixels': 0,  # 像素数小于该值的斑块在提取轮廓前去掉，0 表示不过滤
+    'min_blob_extent': 0,  # 外包框长边小于该值（像素）的斑块在提取轮廓前去掉，0 表示不过滤
+    'crop_to_boundary': False,  # 整幅模式下先裁剪到边界外包框对应的像素窗口，跨越窗口边的斑块的洞中的斑块会多提取出来
+    'keep_holes': False  # 整幅模式下保留多边形内部的洞（RETR_CCOMP）
+}
+
+# 同一日期多边形的去重参数，见 polygon_dedupe.PolygonDeduper
+dedupe_config = {
+    'enabled': True,
+    'iou_threshold': 0.5,  # IoU 不低于该值视为重复
+    'mode': 'drop'  # 'drop' 保留面积最大的一个，'merge' 合并为一个
+}
+
+# 面积计算口径，见 geo_area.AREA_CRS；'mercator' 与历史数据的 Area 一致。
+# 变化检测用相邻日期的 Area 相减，改为 'equal_area' 前需先按新口径重算表中已有记录的 Area
+area_config = {
+    'method': 'mercator'
+}
+
+
+def _post(url, timeout):
+    with urllib.request.urlopen(urllib.request.Request(url, method='POST'), timeout=timeout):
+        pass
+
+
+def notify_dates_loaded(dates, url=api_invalidate_url, seed_tiles=False, timeout=5):
+    """
+    通知 API 服务这些日期写入了新数据，seed_tiles=True 时同时请求预生成该日期的矢量瓦片。
+    通知失败只打印提示，不影响入库结果；返回通知失败的日期集合。
+    """
+    failed = set()
+    for date in sorted(dates):
+        try:
+            _post(f"{url}?{urllib.parse.urlencode({'Date': date})}", timeout)
+            print(f"已通知 API 失效缓存: Date={date}")
+            if seed_tiles:
+                _post(api_tile_seed_url.format(date=urllib.parse.quote(str(date))), timeout)
+                print(f"已请求预生成瓦片: Date={date}")
+        except (urllib.error.URLError, OSError) as e:
+            print(f"通知 API 失败: Date={date}, 错误: {e}")
+            failed.add(date)
+    return failed
+
+
+def run_scenes(extract, scenes, workers=1, max_pending=None, executor=None):
+    """
+    依次产出 (场景参数, 提取结果)。
+
+    workers > 1 时用进程池并行执行 extract（轮廓提取、地理配准、面积计算），
+    结果仍按场景提交顺序返回，保证由单个写入端分配的 ID 是确定的；
+    max_pending 限制同时在途的场景数，避免结果堆积占用内存；
+    传入 executor 时复用该进程池（如常驻的入库服务），否则临时创建一个。
+    """
+    if workers <= 1 and executor is None:
+        for scene in scenes:
+            yield scene, extract(*scene)
+        return
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from run_scenes(extract, scenes, workers, max_pending, executor)
+        return
+
+    max_pending = max_pending or max(workers, 1) * 2
+    pending = deque()
+    for scene in scenes:
+        pending.append((scene, executor.submit(extract, *scene)))
+        if len(pending) >= max_pending:
+            done_scene, future = pending.popleft()
+            yield done_scene, future.result()
+    while pending:
+        done_scene, future = pending.popleft()
+        yield done_scene, future.result()
+
+
+class SceneProgress:
+    """
+    按场景打印入库进度和吞吐量，累计各阶段耗时并记入入库指标。
+    """
+
+    def __init__(self, total, table=None):
+        self.total = total
+        self.table = table
+        self.done = 0
+        self.rows = 0
+        self.stages = StageTimer()
+        self.start = time.perf_counter()
+
+    def update(self, name, rows, timer=None):
+        """
+        记录一个场景的结果；timer 为该场景的 StageTimer，提取失败的场景传 None。
+        """
+        self.done += 1
+        self.rows += rows
+        if timer is not None:
+            self.stages.merge(timer)
+        if self.table is not None:
+            ingest_scenes_total.inc(table=self.table, status='failed' if timer is None else 'ok')
+            ingest_rows_total.inc(rows, table=self.table)
+            if timer is not None:
+                timer.observe(ingest_stage_seconds, table=self.table)
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(
+            f"[{self.done}/{self.total}] {os.path.basename(name)}: {rows} 行, 累计 {self.rows} 行, "
+            f"{self.done / elapsed:.2f} 场景/秒, {self.rows / elapsed:.1f} 行/秒"
+        )
+
+    def finish(self):
+        """
+        打印本次运行各阶段的累计耗时（多进程时为各进程耗时之和）。
+        """
+        if self.stages.durations:
+            print(f"各阶段耗时: {self.stages.format()}")
+
+
+class IngestionContext:
+    """
+    一次入库运行共享的只读数据：深圳边界（已 prepare）及其外包框、面积计算口径。
+    """
+
+    def __init__(self, shenzhen_shp_path, area_method='mercator'):
+        # geopandas 只在入库脚本中使用，按需导入
+        import geopandas as gpd
+
+        self.boundary = gpd.read_file(shenzhen_shp_path).geometry.unary_union
+        shapely.prepare(self.boundary)
+        self.bounds = self.boundary.bounds
+        self.area_method = area_method
+
+    def within_boundary(self, geoms):
+        """
+        返回 (经度, 纬度) 顺序的几何数组中完全位于深圳边界内的布尔掩码。
+        先用外包框排除明显在外的多边形，再对剩余部分做一次批量的已 prepare 判断。
+        """
+        geoms = np.asarray(geoms, dtype=object)
+        mask = np.zeros(len(geoms), dtype=bool)
+        if not len(geoms):
+            return mask
+        min_x, min_y, max_x, max_y = self.bounds
+        box = shapely.bounds(geoms)
+        candidates = (box[:, 0] >= min_x) & (box[:, 1] >= min_y) & (box[:, 2] <= max_x) & (box[:, 3] <= max_y)
+        # polygon.within(boundary) 等价于 boundary.contains(polygon)，后者能利用 prepare 的索引
+        mask[candidates] = shapely.contains(self.boundary, geoms[candidates])
+        return mask
+
+    def metric_areas(self, geoms):
+        """
+        批量计算 (经度, 纬度) 顺序几何的面积（平方米），口径见 area_config。
+        """
+        return polygon_areas(geoms, self.area_method)
+
+
+def make_deduper(cursor, table, config=dedupe_config):
+    """
+    创建写库进程使用的去重器，各日期已入库的多边形按需从 table 读取；未启用去重时返回 None。
+    """
+    if not config['enabled']:
+        return None
+
+    def load_existing(date):
+        cursor.execute(f"SELECT ST_AsBinary(Location) FROM {table} WHERE Date = %s", (date,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def merged_areas(geoms):
+        # 去重器处理的是 (纬度, 经度) 顺序的几何，计算面积前换回 (经度, 纬度)
+        return polygon_areas(swap_axes(geoms), area_config['method'])
+
+    return PolygonDeduper(config['iou_threshold'], config['mode'], load_existing, merged_areas)
+
+
+_contexts = {}
+
+
+def get_ingestion_context(shenzhen_shp_path):
+    """
+    返回该边界文件对应的 IngestionContext，每个进程只加载一次（进程池中的每个工作进程各自缓存一份）。
+    """
+    context = _contexts.get(shenzhen_shp_path)
+    if context is None:
+        context = _contexts[shenzhen_shp_path] = IngestionContext(shenzhen_shp_path, area_config['method'])
+    return context
+
+
+class BatchWriter:
+    """
+    把多边形记录攒成多行 INSERT 批量写入，几何以 WKB 参数传递，每 commit_every 行提交一次并打印写入速度。
+
+    pymysql 的 executemany 只能改写全部为 %s 的 VALUES 子句，含 ST_GeomFromWKB 时会退化为逐行执行，
+    因此这里自行拼接多行语句。
+    """
+
+    def __init__(self, cursor, table, batch_size=1000, commit_every=None, columns=None):
+        self.cursor = cursor
+        self.table = table
+        # 列名到占位符的映射，默认为入库表的 (ID, Date, Area, Location)
+        self.columns = columns or polygon_columns
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.pending = []
+        self.written = 0
+        self.uncommitted = 0
+        self.start = time.perf_counter()
+
+    def _sql(self, count):
+        row = '(' + ', '.join(self.columns.values()) + ')'
+        return f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES {', '.join([row] * count)}"
+
+    def add(self, *row):
+        """
+        追加一条记录（按 columns 的顺序），攒够 batch_size 条时写入。
+        """
+        self.pending.append(row)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+            if self.commit_every and self.uncommitted >= self.commit_every:
+                self.commit()
+
+    def flush(self):
+        """
+        写入攒下的记录，返回成功写入的行数。批量写入失败时逐行重试，只跳过出错的记录。
+        """
+        rows, self.pending = self.pending, []
+        if not rows:
+            return 0
+        try:
+            self.cursor.execute(self._sql(len(rows)), [value for row in rows for value in row])
+            count = len(rows)
+        except pymysql.MySQLError as e:
+            print(f"批量插入出错，改为逐行插入: {e}")
+            count = 0
+            for row in rows:
+                try:
+                    self.cursor.execute(self._sql(1), row)
+                    count += 1
+                except pymysql.MySQLError as e:
+                    print(f"插入数据时出错: ID={row[0]}, 错误: {e}")
+
+        self.written += count
+        self.uncommitted += count
+        return count
+
+    def commit(self):
+        """
+        写入剩余记录并提交事务。
+        """
+        self.flush()
+        self.cursor.connection.commit()
+        self.uncommitted = 0
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(f"已提交 {self.written} 行, 写入速度 {self.written / elapsed:.1f} 行/秒")
+
+
+def write_scene_rows(writer, start_date, records, record_id, loaded_dates=None, deduper=None):
+    """
+    把一个场景提取出的多边形交给批量写入器，返回下一个可用的记录 ID。
+    deduper 不为空时先丢弃（或合并）与同一日期已有多边形重复的记录。
+    """
+    if deduper is not None:
+        records = deduper.filter(start_date, records)
+    for area, location_wkb in records:
+        writer.add(record_id, start_date, area, location_wkb)
+        record_id += 1
+    if records and loaded_dates is not None:
+        loaded_dates.add(start_date)
+    return record_id
+
+
+def load_scenes(table, extract_scene, scene_keys, scenes, connection, seed_tiles=False, workers=1,
+                write_config=write_config, incremental=False, executor=None):
+    """
+    用 extract_scene(*场景参数) 处理匹配好的场景并写入入库表 table，返回写入的行数。
+    extract_scene 返回 (日期, [(面积, WKB), ...], 各阶段耗时字典) 或 None，需为模块级函数以便在进程池中执行。
+
+    workers > 1 时各场景在进程池中并行处理（executor 不为空时复用该进程池），由当前进程按场景顺序统一写库并分配 ID；
+    写库按 write_config 分批插入、分段提交。
+    incremental=True 时按入库清单跳过文件未变化的已入库场景，清理上次中断的场景，并从表中最大 ID 之后继续编号；
+    场景在变化检测和 API 通知都成功后才标记为完成，上次检测或通知失败的日期在本次重新处理。
+    """
+    record_id = 1
+    loaded_dates = set()
+    undetected_dates = set()
+    with connection.cursor() as cursor:
+        manifest = None
+        previous_scenes = {}
+        if incremental:
+            manifest = IngestManifest(cursor, table)
+            manifest.recover()
+            undetected_dates = manifest.undetected_dates()
+            if undetected_dates:
+                print(f"上次未完成变化检测或通知的日期: {', '.join(sorted(undetected_dates))}")
+            previous_scenes = manifest.loaded()
+            record_id = manifest.next_id()
+
+            # 跳过文件未变化的已入库场景
+            pending_scenes = []
+            fingerprints = {}
+            for key, scene in zip(scene_keys, scenes):
+                fingerprints[key] = scene_fingerprint(scene[:-1])
+                previous = previous_scenes.get(key)
+                if previous is None or previous[0] != fingerprints[key]:
+                    pending_scenes.append((key, scene))
+            print(f"增量模式: 跳过已入库场景 {len(scenes) - len(pending_scenes)} 个, 待入库 {len(pending_scenes)} 个, 起始 ID={record_id}")
+            scene_keys = [key for key, _ in pending_scenes]
+            scenes = [scene for _, scene in pending_scenes]
+
+        progress = SceneProgress(len(scenes), table)
+        writer = BatchWriter(cursor, table, write_config['batch_size'], write_config['commit_every'])
+        deduper = make_deduper(cursor, table)
+        for key, (scene, result) in zip(scene_keys, run_scenes(extract_scene, scenes, workers, executor=executor)):
+            first_id = record_id
+            timer = None
+            if result is not None:
+                start_date, records, durations = result
+                timer = StageTimer(durations)
+                if manifest is not None:
+                    manifest.begin(key, fingerprints[key], first_id, previous_scenes.get(key))
+                    if deduper is not None and key in previous_scenes:
+                        # 场景的旧数据刚被删除，已缓存的各日期已有多边形需要重新加载
+                        deduper.reset_existing()
+                with timer.stage('insert'):  # 去重和批量写入
+                    record_id = write_scene_rows(writer, start_date, records, record_id, loaded_dates, deduper)
+                if manifest is not None:
+                    manifest.finish(key, record_id - first_id)
+            progress.update(scene[1], record_id - first_id, timer)
+
+        writer.commit()  # 写入剩余记录并提交事务
+        progress.finish()
+        if deduper is not None:
+            print(f"去重丢弃重复多边形: {deduper.dropped} 个")
+
+    # change_detection 依赖本模块，在此处导入避免循环导入
+    from change_detection import change_config, update_change_detection
+
+    # 本表是变化检测的数据源时，重算新写入日期（及其后一日期）的 Trans / Ratios / Center
+    pending_dates = loaded_dates | undetected_dates
+    changed_dates = set()
+    if change_config['source'] == table and pending_dates:
+        changed_dates = update_change_detection(connection, pending_dates)
+
+    # 通知 API 失效新写入日期及被重算的后一日期的缓存，并按需预生成矢量瓦片
+    failed = notify_dates_loaded(pending_dates | changed_dates, seed_tiles=seed_tiles)
+
+    # 变化检测出错时异常直接抛出，场景停留在 'written'；通知失败时同样保留，下次入库重试
+    if manifest is not None and not failed:
+        with connection.cursor() as cursor:
+            IngestManifest(cursor, table).mark_done()
+    return progress.rows
@@ -0,0 +1,101 @@
+"""
+常驻的目录监视入库服务。
+
+周期性扫描数据目录，用入库脚本的 match_scenes 按同样的文件名键规则组装场景，
+文件全部到齐且在 settle_seconds 内未再修改的场景才会交给 load_scenes 增量入库；
+进程池在整个服务期间复用，每轮最多入库 max_scenes 个场景，积压的场景在下一轮立即继续处理。
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymysql
+
+from ingest_manifest import scene_fingerprint
+from metrics import start_http_server
+
+# 监视参数
+watch_config = {
+    'interval': 30,  # 没有积压时两轮扫描之间的间隔（秒）
+    'settle_seconds': 60,  # 文件最后修改后至少经过多久才入库，避免读到仍在拷贝中的文件
+    'max_scenes': 50,  # 每轮最多入库的场景数，控制单次事务和通知的粒度
+    'metrics_port': None  # 在该端口提供 /metrics（各阶段耗时、场景数、行数），None 表示不导出
+}
+
+
+def _settled(files, settle_seconds, now):
+    try:
+        return all(now - os.stat(path).st_mtime >= settle_seconds for path in files)
+    except OSError:  # 文件在扫描期间被移动或删除
+        return False
+
+
+def _rollback(connection):
+    """
+    回滚本轮未提交的数据行和清单记录，避免下一轮 recover() 把它们连同 'done' 状态一起提交，
+    使这些场景既未做变化检测和缓存失效、又被当作已入库跳过。
+    """
+    try:
+        connection.rollback()
+    except pymysql.MySQLError as e:  # 连接已断开时未提交的事务已由服务器丢弃
+        print(f"回滚失败: {e}")
+
+
+def watch(match_scenes, load_scenes, connection, workers=1, config=watch_config):
+    """
+    持续监视并入库，直到按 Ctrl+C 退出。
+
+    match_scenes() 返回 (场景键列表, 场景参数列表)，场景参数的最后一项为边界文件路径、其余为场景文件；
+    load_scenes(场景键列表, 场景参数列表, connection, executor=...) 增量写入并返回写入的行数。
+    """
+    # 本服务已交给 load_scenes 处理过的场景指纹，未变化的场景不再重复查询入库清单
+    handled = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    metrics_server = None
+    if config.get('metrics_port'):
+        metrics_server = start_http_server(config['metrics_port'])
+    print(f"入库服务已启动: 扫描间隔 {config['interval']} 秒, 进程数 {workers}"
+          + (f", 指标端口 {config['metrics_port']}" if metrics_server is not None else ""))
+    try:
+        while True:
+            backlog = False
+            try:
+                scene_keys, scenes = match_scenes()
+                now = time.time()
+                ready = []
+                for key, scene in zip(scene_keys, scenes):
+                    if not _settled(scene[:-1], config['settle_seconds'], now):
+                        continue
+                    fingerprint = scene_fingerprint(scene[:-1])
+                    if handled.get(key) != fingerprint:
+                        ready.append((key, scene, fingerprint))
+
+                backlog = len(ready) > config['max_scenes']
+                ready = ready[:config['max_scenes']]
+                if ready:
+                    print(f"发现新场景 {len(ready)} 个" + (", 其余场景下一轮继续" if backlog else ""))
+                    connection.ping(reconnect=True)
+                    rows = load_scenes(
+                        [key for key, _, _ in ready], [scene for _, scene, _ in ready], connection, executor=executor
+                    )
+                    # 提取失败的场景同样记为已处理，文件更新（指纹变化）后才会重试
+                    handled.update((key, fingerprint) for key, _, fingerprint in ready)
+                    print(f"本轮入库完成: {rows} 行")
+            except pymysql.MySQLError as e:
+                print(f"入库服务数据库错误，稍后重试: {e}")
+                _rollback(connection)
+                backlog = False
+            except Exception as e:
+                print(f"入库服务本轮出错，稍后重试: {e}")
+                _rollback(connection)
+                backlog = False
+
+            if not backlog:
+                time.sleep(config['interval'])
+    except KeyboardInterrupt:
+        print("入库服务已停止")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if metrics_server is not None:
+            metrics_server.shutdown()
@@ -0,0 +1,114 @@
+"""
+增量 / 可断点续传入库用的场景清单（ingest_manifest 表，见 migrations/003_ingest_manifest.sql）。
+
+清单与数据行通过同一个连接写入、同一事务提交，因此两者总是一致：
+    status = 'loading'  场景已开始写入但尚未完成，重新运行时删除 ID >= first_id 的行后重新入库
+    status = 'written'  场景已完整入库，但变化检测或 API 通知尚未成功，重新运行时重新检测其日期（见 migrations/006）
+    status = 'done'     场景已完整入库并完成变化检测和通知，文件指纹未变化时跳过
+单个写入端按顺序分配 ID，一个场景的行占用 [first_id, first_id + row_count) 区间。
+"""
+import hashlib
+import os
+
+
+def scene_fingerprint(paths):
+    """
+    由场景各文件的名称、大小和修改时间计算指纹，文件被替换或重新生成时指纹随之改变。
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    某个目标表的场景清单。
+    """
+
+    def __init__(self, cursor, table):
+        self.cursor = cursor
+        self.table = table
+
+    def recover(self):
+        """
+        清理上次中断时写了一半的场景，返回删除的行数。
+        """
+        self.cursor.execute(
+            "SELECT scene_key, first_id FROM ingest_manifest WHERE table_name = %s AND status = 'loading'",
+            (self.table,)
+        )
+        deleted = 0
+        for scene_key, first_id in self.cursor.fetchall():
+            # 中断的场景总是最后写入的，ID >= first_id 的行都属于它
+            deleted += self.cursor.execute(f"DELETE FROM {self.table} WHERE ID >= %s", (first_id,))
+            self.cursor.execute(
+                "DELETE FROM ingest_manifest WHERE table_name = %s AND scene_key = %s", (self.table, scene_key)
+            )
+            print(f"清理未完成的场景: Key={scene_key}, 起始 ID={first_id}")
+        self.cursor.connection.commit()
+        return deleted
+
+    def loaded(self):
+        """
+        返回已完整入库的场景 {scene_key: (fingerprint, first_id, row_count)}。
+        """
+        self.cursor.execute(
+            "SELECT scene_key, fingerprint, first_id, row_count FROM ingest_manifest "
+            "WHERE table_name = %s AND status IN ('written', 'done')",
+            (self.table,)
+        )
+        return {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+
+    def undetected_dates(self):
+        """
+        返回已入库但尚未完成变化检测和通知的场景所写入的日期（字符串集合）。
+        """
+        self.cursor.execute(
+            f"SELECT DISTINCT t.Date FROM ingest_manifest m JOIN {self.table} t "
+            "ON t.ID >= m.first_id AND t.ID < m.first_id + m.row_count "
+            "WHERE m.table_name = %s AND m.status = 'written'",
+            (self.table,)
+        )
+        return {str(row[0]) for row in self.cursor.fetchall()}
+
+    def next_id(self):
+        """
+        从目标表当前最大 ID 之后继续分配。
+        """
+        self.cursor.execute(f"SELECT COALESCE(MAX(ID), 0) + 1 FROM {self.table}")
+        return self.cursor.fetchone()[0]
+
+    def begin(self, scene_key, fingerprint, first_id, previous=None):
+        """
+        标记场景开始写入；previous 为该场景上次入库的 (fingerprint, first_id, row_count)，其旧数据会被删除。
+        """
+        if previous is not None:
+            _, old_first_id, old_count = previous
+            self.cursor.execute(
+                f"DELETE FROM {self.table} WHERE ID >= %s AND ID < %s", (old_first_id, old_first_id + old_count)
+            )
+        self.cursor.execute(
+            "REPLACE INTO ingest_manifest (table_name, scene_key, fingerprint, first_id, row_count, status) "
+            "VALUES (%s, %s, %s, %s, 0, 'loading')",
+            (self.table, scene_key, fingerprint, first_id)
+        )
+
+    def finish(self, scene_key, row_count):
+        """
+        标记场景已完整入库，与场景的数据行一同提交；变化检测和通知完成后再由 mark_done 标记。
+        """
+        self.cursor.execute(
+            "UPDATE ingest_manifest SET row_count = %s, status = 'written' WHERE table_name = %s AND scene_key = %s",
+            (row_count, self.table, scene_key)
+        )
+
+    def mark_done(self):
+        """
+        变化检测和通知都成功后，把所有 'written' 场景标记为完成并提交。
+        """
+        self.cursor.execute(
+            "UPDATE ingest_manifest SET status = 'done' WHERE table_name = %s AND status = 'written'", (self.table,)
+        )
+        self.cursor.connection.commit()
@@ -0,0 +1,294 @@
+"""
+进程内的轻量指标和分阶段计时，按 Prometheus 文本格式导出。
+
+不依赖 prometheus_client：只提供计数器、仪表和直方图，observe 只是一次二分查找加一次加锁累加，
+开销远小于被测的读图、SQL、几何解码等阶段。
+    - StageTimer 累计一个工作单元（一个场景、一次请求）内各阶段的耗时，结束后一次性记入直方图；
+    - activate / stage 把当前请求的计时器绑定到线程上，数据库游标、WKT 解码等底层代码无需传参即可记录耗时，
+      没有绑定计时器时（入库进程、变化检测等）stage 不做任何事；
+    - SlowRequestProfiler 按比例对请求采样 cProfile，只保存超过阈值的慢请求；
+    - start_http_server 为没有 Web 框架的进程（入库服务）在后台线程中提供 /metrics。
+"""
+import bisect
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pymysql
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 耗时直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# 响应大小直方图的分桶（字节）
+BYTE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+
+# 按名称注册的全部指标；同名指标重复创建（如模块被重新加载）时以后创建的为准
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry[name] = self
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _samples(self):
+        """
+        产出 (后缀, 标签对, 值)。
+        """
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield '', list(zip(self.labels, key)), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+        for suffix, pairs, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(pairs)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """
+    只增不减的计数器。
+    """
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    可任意设置的瞬时值，通常在抓取时从各组件的 stats() 刷新。
+    """
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    固定分桶的直方图，导出 _bucket / _sum / _count。
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            pairs = list(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield '_bucket', pairs + [('le', _format_value(float(bound)))], cumulative
+            yield '_sum', pairs, total
+            yield '_count', pairs, count
+
+
+def render_metrics():
+    """
+    以 Prometheus 文本格式导出全部指标。
+    """
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+class StageTimer:
+    """
+    累计一个工作单元内各阶段的耗时（秒），同名阶段多次出现时累加。
+    durations 为普通字典，可以随提取结果从子进程传回。
+    """
+
+    def __init__(self, durations=None):
+        self.durations = dict(durations or {})
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def merge(self, other):
+        for name, seconds in other.durations.items():
+            self.add(name, seconds)
+
+    def observe(self, histogram, **labels):
+        """
+        把各阶段耗时记入带 stage 标签的直方图。
+        """
+        for name, seconds in self.durations.items():
+            histogram.observe(seconds, stage=name, **labels)
+
+    def format(self):
+        total = sum(self.durations.values()) or 1e-9
+        return ', '.join(
+            f"{name} {seconds:.2f}s ({seconds / total:.0%})"
+            for name, seconds in sorted(self.durations.items(), key=lambda item: -item[1])
+        )
+
+
+# 每个线程当前绑定的计时器（Flask 每个请求在一个线程内处理）
+_local = threading.local()
+
+
+def activate(timer):
+    """
+    把计时器绑定到当前线程，传入 None 解除绑定。
+    """
+    _local.timer = timer
+
+
+def current_timer():
+    return getattr(_local, 'timer', None)
+
+
+@contextmanager
+def stage(name):
+    """
+    记入当前线程绑定的计时器，没有绑定时不做任何事。
+    """
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def add_stage(name, seconds):
+    timer = current_timer()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+class TimedDictCursor(pymysql.cursors.DictCursor):
+    """
+    行为与 DictCursor 相同；当前线程绑定了计时器时，execute（缓冲游标在其中读完全部结果）计入 sql 阶段。
+    """
+
+    def execute(self, query, args=None):
+        with stage('sql'):
+            return super().execute(query, args)
+
+
+class SlowRequestProfiler:
+    """
+    按 sample_rate 的比例对请求启用 cProfile，耗时不低于 slow_seconds 的采样请求把 profile 写入 dump_dir，
+    可用 python -m pstats 或 snakeviz 查看。sample_rate 为 0 时没有任何开销。
+    cProfile 只记录启用它的线程，在多线程服务器中每个请求各自采样。
+    """
+
+    def __init__(self, sample_rate=0.0, slow_seconds=1.0, dump_dir=None):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.dump_dir = dump_dir
+
+    def start(self):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # 同一线程已有其他 profiler 在运行
+            return None
+        return profile
+
+    def finish(self, profile, elapsed, name):
+        """
+        停止采样，慢请求返回写出的文件路径，否则返回 None。
+        """
+        if profile is None:
+            return None
+        profile.disable()
+        if elapsed < self.slow_seconds or not self.dump_dir:
+            return None
+        os.makedirs(self.dump_dir, exist_ok=True)
+        path = os.path.join(self.dump_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{int(elapsed * 1000)}ms.prof")
+        profile.dump_stats(path)
+        print(f"慢请求 {name} 耗时 {elapsed:.3f}s, profile 已写入 {path}")
+        return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # 不为每次抓取打印访问日志
+        pass
+
+
+def start_http_server(port, host='0.0.0.0'):
+    """
+    在后台线程中提供 GET /metrics，返回服务器对象（shutdown() 停止）。
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,14 @@
+-- greenland 表空间索引迁移
+-- /api/coordinates_in_area 使用 MBRIntersects(Location, ...) 做候选筛选，需要 Location 上的 SPATIAL INDEX。
+-- MySQL 8 要求空间索引列为 NOT NULL，且列上声明 SRID 后优化器才会使用该索引。
+
+-- 1. 清理无法建立索引的空几何记录（执行前请确认数量）
+-- SELECT COUNT(*) FROM greenland WHERE Location IS NULL;
+DELETE FROM greenland WHERE Location IS NULL;
+
+-- 2. 声明列的 SRID 并设为 NOT NULL
+ALTER TABLE greenland MODIFY Location GEOMETRY NOT NULL SRID 4326;
+
+-- 3. 建立空间索引和日期索引
+ALTER TABLE greenland ADD SPATIAL INDEX idx_greenland_location (Location);
+ALTER TABLE greenland ADD INDEX idx_greenland_date (Date);
@@ -0,0 +1,15 @@
+-- greenland6 表分页 / 视口查询索引迁移
+-- /api/coordinates 的 limit/after 键集分页按 (Date, ID) 扫描，bbox 过滤走 Location 空间索引，
+-- 整日期的面积变化最大/最小记录按 (Date, Trans) 取一条。
+
+-- 1. 清理无法建立空间索引的空几何记录（执行前请确认数量）
+-- SELECT COUNT(*) FROM greenland6 WHERE Location IS NULL;
+DELETE FROM greenland6 WHERE Location IS NULL;
+
+-- 2. 声明列的 SRID 并设为 NOT NULL
+ALTER TABLE greenland6 MODIFY Location GEOMETRY NOT NULL SRID 4326;
+
+-- 3. 建立空间索引和分页 / 极值索引
+ALTER TABLE greenland6 ADD SPATIAL INDEX idx_greenland6_location (Location);
+ALTER TABLE greenland6 ADD INDEX idx_greenland6_date_id (Date, ID);
+ALTER TABLE greenland6 ADD INDEX idx_greenland6_date_trans (Date, Trans);
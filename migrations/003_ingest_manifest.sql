@@ -0,0 +1,14 @@
+-- 入库场景清单表迁移
+-- json-calculate-sql.py / jgw-calculate-sql.py 的增量模式（incremental=True）按场景记录入库状态，
+-- 跳过文件未变化的已入库场景，并在中断后清理写了一半的场景。
+
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    table_name VARCHAR(64) NOT NULL,
+    scene_key VARCHAR(255) NOT NULL,
+    fingerprint CHAR(40) NOT NULL,
+    first_id INT NOT NULL,
+    row_count INT NOT NULL DEFAULT 0,
+    status ENUM('loading', 'done') NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, scene_key)
+);
@@ -0,0 +1,17 @@
+-- 变化检测汇总表迁移
+-- change_detection.py 在入库后按日期重算 greenland6 的 Trans / Ratios / Center，
+-- 并把每个日期面积变化最大/最小的记录写入本表，/api/coordinates 直接按 (Date, ID) 读取这两条记录，不再按 Trans 排序查找。
+
+CREATE TABLE IF NOT EXISTS greenland_date_summary (
+    Date DATE NOT NULL PRIMARY KEY,
+    PolygonCount INT NOT NULL,
+    TotalArea DOUBLE NOT NULL,
+    MaxIncreaseID INT NULL,
+    MaxIncrease DOUBLE NULL,
+    MaxDecreaseID INT NULL,
+    MaxDecrease DOUBLE NULL,
+    PreviousDate DATE NULL,
+    UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- 极值记录按 (Date, ID) 读取，沿用 002 中的 idx_greenland6_date_id 索引
@@ -0,0 +1,18 @@
+-- 时间序列汇总迁移
+-- /api/summary 直接读取 change_detection.py 维护的汇总表画趋势图，不再下载各日期的全部多边形在前端求和。
+-- 执行后运行一次 python change_detection.py（不带日期）回填已有日期的 TotalTrans 和网格汇总。
+
+-- 1. 每日汇总增加总面积变化
+ALTER TABLE greenland_date_summary ADD COLUMN TotalTrans DOUBLE NOT NULL DEFAULT 0 AFTER TotalArea;
+
+-- 2. 按多边形中心点所在网格单元（change_config['cell_size'] 度）的每日汇总
+--    CellRow = FLOOR(纬度 / cell_size)，CellCol = FLOOR(经度 / cell_size)
+CREATE TABLE IF NOT EXISTS greenland_cell_summary (
+    Date DATE NOT NULL,
+    CellRow INT NOT NULL,
+    CellCol INT NOT NULL,
+    PolygonCount INT NOT NULL,
+    TotalArea DOUBLE NOT NULL,
+    TotalTrans DOUBLE NOT NULL,
+    PRIMARY KEY (Date, CellRow, CellCol)
+);
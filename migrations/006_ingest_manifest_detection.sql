@@ -0,0 +1,5 @@
+-- 入库清单增加变化检测状态迁移
+-- 场景的数据行提交后先记为 'written'，变化检测和 API 通知都成功后才改为 'done'；
+-- 变化检测或通知失败、进程中断时场景停留在 'written'，下次增量入库会重新检测这些场景的日期并重发通知。
+
+ALTER TABLE ingest_manifest MODIFY status ENUM('loading', 'written', 'done') NOT NULL;
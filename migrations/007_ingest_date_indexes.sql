@@ -0,0 +1,6 @@
+-- 入库表按日期查询的索引迁移
+-- change_detection.py 按 (Date, ID) 顺序读取某日期的多边形并用 MAX/MIN(Date) 查找相邻日期，
+-- 入库去重按 Date 加载同一日期的已有多边形；没有索引时每次都要全表扫描。
+
+ALTER TABLE greenland2 ADD INDEX idx_greenland2_date_id (Date, ID);
+ALTER TABLE greenland3 ADD INDEX idx_greenland3_date_id (Date, ID);
@@ -0,0 +1,175 @@
+"""
+同一日期多边形的去重与重叠合并。
+
+相互重叠的场景会对同一块绿地提取出几乎相同的多边形。用 STRtree 批量查询相交的候选对，
+按交并比（IoU）判定重复，整体复杂度约为 O(n log n)：
+    - 同一批新多边形之间的重复按并查集分组，mode='drop' 时保留组内面积最大的一个，mode='merge' 时合并为一个；
+    - 与本次运行已接受的、以及数据库中该日期已有的多边形重复的新多边形直接丢弃。
+几何均为表中 (纬度, 经度) 顺序的 WKB，IoU 与坐标轴顺序无关。
+"""
+import numpy as np
+import shapely
+
+
+def _iou_pairs(tree, geoms, iou_threshold, distinct=False):
+    """
+    返回 geoms 与 tree 中 IoU 不低于阈值的候选对 (geoms 下标, tree 下标)。
+    distinct=True 表示 tree 就是由 geoms 建立的，只返回 geoms 下标小于 tree 下标的对。
+    """
+    left, right = tree.query(geoms, predicate='intersects')
+    if distinct:
+        left, right = left[left < right], right[left < right]
+    if not len(left):
+        return left, right
+    others = tree.geometries.take(right)
+    area_left = shapely.area(geoms[left])
+    area_right = shapely.area(others)
+
+    # 先用外包框交集面积估计 IoU 上界，排除大部分只是擦边相交的候选对，再对剩余的做精确求交
+    box_left = shapely.bounds(geoms[left])
+    box_right = shapely.bounds(others)
+    box_inter = (
+        np.clip(np.minimum(box_left[:, 2], box_right[:, 2]) - np.maximum(box_left[:, 0], box_right[:, 0]), 0, None)
+        * np.clip(np.minimum(box_left[:, 3], box_right[:, 3]) - np.maximum(box_left[:, 1], box_right[:, 1]), 0, None)
+    )
+    upper = np.minimum(np.minimum(box_inter, area_left), area_right)
+    possible = upper >= iou_threshold * (area_left + area_right - upper)
+    left, right, others = left[possible], right[possible], others[possible]
+    area_left, area_right = area_left[possible], area_right[possible]
+
+    inter = shapely.area(shapely.intersection(geoms[left], others))
+    union = area_left + area_right - inter
+    iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    hit = iou >= iou_threshold
+    return left[hit], right[hit]
+
+
+def _groups(n, left, right):
+    """
+    并查集：按重复对把 0..n-1 分组，返回每个元素所属组的代表下标。
+    """
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(left.tolist(), right.tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    return np.array([find(i) for i in range(n)], dtype=np.int64)
+
+
+class PolygonDeduper:
+    """
+    按日期累积已接受的多边形，对每个场景的新记录去重。
+
+    loader(date) 返回数据库中该日期已有多边形的 WKB 列表；area_func(geoms) 计算合并后多边形的面积（平方米），
+    仅 mode='merge' 时需要。
+    """
+
+    def __init__(self, iou_threshold=0.5, mode='drop', loader=None, area_func=None):
+        if mode not in ('drop', 'merge'):
+            raise ValueError(f"Unsupported dedupe mode: {mode}")
+        self.iou_threshold = iou_threshold
+        self.mode = mode
+        self.loader = loader
+        self.area_func = area_func
+        self.existing = {}  # 日期 -> 数据库中已有多边形的 STRtree
+        self.accepted = {}  # 日期 -> 本次运行已接受多边形的 (主 STRtree, 最近 STRtree)
+        self.dropped = 0
+
+    def reset_existing(self):
+        """
+        数据库中的已有数据被删除或替换后调用，下次遇到各日期时重新加载。
+        """
+        self.existing = {}
+
+    def _existing_tree(self, date):
+        if date not in self.existing:
+            tree = None
+            if self.loader is not None:
+                geoms = shapely.from_wkb(self.loader(date), on_invalid='ignore')
+                geoms = geoms[~shapely.is_missing(geoms)]
+                invalid = ~shapely.is_valid(geoms)
+                geoms[invalid] = shapely.make_valid(geoms[invalid])
+                if len(geoms):
+                    tree = shapely.STRtree(geoms)
+            self.existing[date] = tree
+        return self.existing[date]
+
+    def _accept(self, date, geoms):
+        """
+        把新接受的多边形加入该日期的索引。每个日期只保留两棵树：新多边形与“最近”树合并重建，
+        合并后不少于主树时再整体并入主树，避免每个场景一棵树、场景越多查询越慢。
+        """
+        main, recent = self.accepted.get(date, (None, None))
+        if recent is not None:
+            geoms = np.concatenate([recent.geometries, geoms])
+        if main is None or len(geoms) >= len(main.geometries):
+            if main is not None:
+                geoms = np.concatenate([main.geometries, geoms])
+            self.accepted[date] = (shapely.STRtree(geoms), None)
+        else:
+            self.accepted[date] = (main, shapely.STRtree(geoms))
+
+    def _resolve_within(self, geoms, areas):
+        """
+        处理同一批新多边形之间的重复，返回 (几何数组, 面积数组, 原记录下标或 -1)。
+        """
+        left, right = _iou_pairs(shapely.STRtree(geoms), geoms, self.iou_threshold, distinct=True)
+        if not len(left):
+            return geoms, areas, np.arange(len(geoms))
+
+        roots = _groups(len(geoms), left, right)
+        order = np.lexsort((-areas, roots))  # 按组排列，组内面积大的在前
+        first = np.sort(order[np.r_[True, roots[order][1:] != roots[order][:-1]]])
+        sizes = np.bincount(roots, minlength=len(geoms))[roots[first]]
+        self.dropped += len(geoms) - len(first)
+        if self.mode == 'drop':
+            return geoms[first], areas[first], first
+
+        # 合并模式：多个成员的组合并为一个多边形，重新计算面积，原 WKB 不再可用
+        kept_geoms = geoms[first].copy()
+        kept_areas = areas[first].copy()
+        source = first.copy()
+        multi = np.flatnonzero(sizes > 1)
+        for k in multi:
+            members = geoms[roots == roots[first[k]]]
+            merged = shapely.union_all(members)
+            if shapely.get_type_id(merged) != shapely.GeometryType.POLYGON:
+                # 合并结果不是单个多边形时保留面积最大的成员
+                continue
+            kept_geoms[k] = merged
+            source[k] = -1
+        if len(multi):
+            kept_areas[multi] = np.where(source[multi] < 0, self.area_func(kept_geoms[multi]), kept_areas[multi])
+        return kept_geoms, kept_areas, source
+
+    def filter(self, date, records):
+        """
+        对一个场景的 [(面积, WKB), ...] 去重，返回保留的记录。
+        """
+        if not records:
+            return records
+        geoms = shapely.from_wkb([wkb for _, wkb in records])
+        areas = np.array([area for area, _ in records], dtype=np.float64)
+        geoms, areas, source = self._resolve_within(geoms, areas)
+
+        keep = np.ones(len(geoms), dtype=bool)
+        for tree in (self._existing_tree(date), *self.accepted.get(date, (None, None))):
+            if tree is not None and keep.any():
+                candidates = np.flatnonzero(keep)
+                left, _ = _iou_pairs(tree, geoms[candidates], self.iou_threshold)
+                keep[candidates[left]] = False
+        self.dropped += int((~keep).sum())
+        if keep.any():
+            self._accept(date, geoms[keep])
+
+        return [
+            (float(area), records[index][1] if index >= 0 else shapely.to_wkb(geom))
+            for geom, area, index in zip(geoms[keep], areas[keep], source[keep])
+        ]
@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from geo_decode import decode_wkt
+
+# 每个几何对象（GEOS 对象 + 行字典）的固定内存开销估计（字节）
+_PER_ROW_OVERHEAD = 600
+# 每个坐标点 (x, y) 的内存开销（字节）
+_PER_COORD_BYTES = 16
+
+
+class DatePolygonIndex:
+    """
+    单个 (表, 日期) 的多边形内存索引：几何数组 + STRtree + 其余字段。
+    """
+
+    def __init__(self, table, date, rows, wkt_field):
+        self.table = table
+        self.date = date
+
+        # 向量化解析 WKT，跳过无效 WKT
+        self.rows, self.geoms = decode_wkt(rows, wkt_field)
+        for row in self.rows:
+            del row[wkt_field]
+        self.tree = STRtree(self.geoms)
+        self.nbytes = int(
+            len(self.rows) * _PER_ROW_OVERHEAD
+            + shapely.get_num_coordinates(self.geoms).sum() * _PER_COORD_BYTES
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def query(self, polygon):
+        """
+        返回与 polygon 相交的记录下标（已按原始顺序排序）。
+        """
+        return np.sort(self.tree.query(polygon, predicate='intersects'))
+
+
+class PolygonIndexCache:
+    """
+    按 (表, 日期) 缓存 DatePolygonIndex，按内存预算做 LRU 淘汰。
+
+    loader(table, date) 返回该日期的行字典列表，其中 wkt_field 字段为 WKT 文本。
+    """
+
+    def __init__(self, loader, memory_budget=512 * 1024 * 1024, wkt_fields=None):
+        self.loader = loader
+        self.memory_budget = memory_budget
+        self.wkt_fields = wkt_fields or {}
+
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}  # 正在加载的 (表, 日期) -> [锁, 等待和持有该锁的线程数]，计数归零时删除
+        self._generations = {}
+        self._epoch = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, table, date):
+        """
+        取出某日期的索引，未命中时加载并构建 STRtree。
+        """
+        key = (table, str(date))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+
+        # 同一日期只允许一个线程加载，其余线程等待后直接命中
+        try:
+            with key_lock[0]:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                        self._hits += 1
+                        return entry
+                    self._misses += 1
+                    generation = (self._epoch, self._generations.get(key[1], 0))
+
+                rows = self.loader(table, date)
+                entry = DatePolygonIndex(table, date, rows, self.wkt_fields.get(table, 'Location'))
+
+                with self._lock:
+                    # 加载期间该日期被失效，则不写入缓存
+                    if (self._epoch, self._generations.get(key[1], 0)) == generation:
+                        self._store(key, entry)
+            return entry
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
+
+    def _store(self, key, entry):
+        if entry.nbytes > self.memory_budget:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._nbytes -= old.nbytes
+        self._entries[key] = entry
+        self._nbytes += entry.nbytes
+        while self._nbytes > self.memory_budget:
+            _, evicted = self._entries.popitem(last=False)
+            self._nbytes -= evicted.nbytes
+            self._evictions += 1
+
+    def invalidate(self, date=None):
+        """
+        失效某日期（所有表）的索引；date 为空时清空全部缓存。
+        """
+        removed = 0
+        with self._lock:
+            for key in list(self._entries):
+                if date is None or key[1] == str(date):
+                    self._nbytes -= self._entries.pop(key).nbytes
+                    removed += 1
+            if date is not None:
+                self._generations[str(date)] = self._generations.get(str(date), 0) + 1
+            else:
+                self._epoch += 1
+            self._invalidations += 1
+        return removed
+
+    def stats(self):
+        """
+        返回命中/未命中计数和内存占用。
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'nbytes': self._nbytes,
+                'memory_budget': self.memory_budget,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def make_etag(body):
+    """
+    强 ETag：响应体的 SHA-256 摘要。
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResponseCache:
+    """
+    已序列化响应的 LRU 缓存，按 (日期, 变体) 存储字节串和 ETag。
+
+    - max_bytes: 内存中缓存的最大字节数
+    - spill_dir: 可选的磁盘溢出目录，被 LRU 淘汰的条目写入磁盘，下次命中时再读回内存
+    - max_spill_bytes: 磁盘溢出文件的最大总字节数，超出时按写入顺序删除最早的文件
+
+    失效代数只保存在内存中，无法判断上次运行留下的溢出文件是否已过期，因此启动时清空溢出目录。
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, spill_dir=None, max_spill_bytes=1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._clear_spill_dir()
+
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        # 磁盘上的溢出文件: 路径 -> 字节数，按写入顺序排列
+        self._spilled = OrderedDict()
+        self._spilled_bytes = 0
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._epoch = 0
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._spills = 0
+
+    @staticmethod
+    def _spill_prefix(date):
+        # 日期来自请求参数，文件名只使用摘要，避免路径穿越
+        return hashlib.sha1(str(date).encode('utf-8')).hexdigest()[:16] + '__'
+
+    def _clear_spill_dir(self):
+        for name in os.listdir(self.spill_dir):
+            if name.endswith('.bin') or name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(self.spill_dir, name))
+                except OSError as e:
+                    print(f"Remove stale spill file {name} failed: {e}")
+
+    def _spill_path(self, date, variant):
+        digest = hashlib.sha1(variant.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.spill_dir, f"{self._spill_prefix(date)}{digest}.bin")
+
+    def get(self, date, variant=''):
+        """
+        返回 (body, etag)，未命中返回 None。
+        """
+        key = (str(date), variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+
+        if self.spill_dir:
+            # 读文件时不持锁，期间该日期可能被失效；代数变化时读到的内容作废，按未命中处理
+            generation = self.generation(date)
+            path = self._spill_path(*key)
+            try:
+                with open(path, 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                entry = (body, make_etag(body))
+                with self._lock:
+                    if generation == (self._epoch, self._generations.get(key[0], 0)):
+                        self._disk_hits += 1
+                        self._store(key, entry)
+                        return entry
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def generation(self, date):
+        """
+        某日期当前的失效代数；在查询数据库之前取出，put 时传回。
+        """
+        with self._lock:
+            return self._epoch, self._generations.get(str(date), 0)
+
+    def put(self, date, variant, body, generation=None):
+        """
+        缓存一份序列化后的响应，返回 (body, etag)。
+
+        若生成响应期间该日期已被失效（generation 不一致），只返回结果不写入缓存。
+        """
+        entry = (body, make_etag(body))
+        with self._lock:
+            if generation is None or generation == (self._epoch, self._generations.get(str(date), 0)):
+                self._store((str(date), variant), entry)
+        return entry
+
+    def _store(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._nbytes -= len(old[0])
+        self._entries[key] = entry
+        self._nbytes += len(entry[0])
+        while self._nbytes > self.max_bytes and self._entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._nbytes -= len(evicted[0])
+            self._evictions += 1
+            if self.spill_dir:
+                self._spill(evicted_key, evicted[0])
+
+    def _spill(self, key, body):
+        path = self._spill_path(*key)
+        try:
+            with open(path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(path + '.tmp', path)
+            self._spills += 1
+        except OSError as e:
+            print(f"Spill cache entry failed for {key[0]}: {e}")
+            return
+        self._spilled_bytes -= self._spilled.pop(path, 0)
+        self._spilled[path] = len(body)
+        self._spilled_bytes += len(body)
+        while self._spilled_bytes > self.max_spill_bytes and self._spilled:
+            oldest, size = self._spilled.popitem(last=False)
+            self._spilled_bytes -= size
+            try:
+                os.remove(oldest)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, date=None):
+        """
+        删除某日期（所有变体，包括磁盘上的）缓存；date 为空时清空全部。
+        """
+        removed = 0
+        with self._lock:
+            if date is None:
+                self._epoch += 1
+            else:
+                self._generations[str(date)] = self._generations.get(str(date), 0) + 1
+
+            for key in list(self._entries):
+                if date is None or key[0] == str(date):
+                    self._nbytes -= len(self._entries.pop(key)[0])
+                    removed += 1
+
+            if self.spill_dir:
+                prefix = self._spill_prefix(date) if date is not None else ''
+                for name in os.listdir(self.spill_dir):
+                    if name.startswith(prefix) and name.endswith('.bin'):
+                        path = os.path.join(self.spill_dir, name)
+                        self._spilled_bytes -= self._spilled.pop(path, 0)
+                        try:
+                            os.remove(path)
+                            removed += 1
+                        except FileNotFoundError:
+                            pass
+        return removed
+
+    def stats(self):
+        """
+        返回命中/未命中计数和内存占用。
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'nbytes': self._nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'spills': self._spills,
+                'spilled_bytes': self._spilled_bytes
+            }
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('aiomysql')
+pytest.importorskip('a2wsgi')
+pytest.importorskip('httpx')
+
+from starlette.testclient import TestClient  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asgi_app  # noqa: E402
+
+DATE_ROWS = [
+    {'ID': 1, 'Date': '2023-05-01', 'Area': 120.0, 'Location_WKT': 'POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))',
+     'Center_WKT': 'POINT (0.5 0.5)', 'Ratios': 1.0, 'Trans': 10.0},
+    {'ID': 2, 'Date': '2023-05-01', 'Area': 80.0, 'Location_WKT': 'POLYGON ((5 5, 6 5, 6 6, 5 6, 5 5))',
+     'Center_WKT': 'POINT (5.5 5.5)', 'Ratios': 1.0, 'Trans': -4.0},
+]
+AREA_ROWS = [
+    {'ID': 1, 'Date': '2023-05-01', 'Area': 120.0, 'Location': 'POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))'},
+    {'ID': 2, 'Date': '2023-05-01', 'Area': 80.0, 'Location': 'POLYGON ((5 5, 6 5, 6 6, 5 6, 5 5))'},
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    不启动 lifespan（不连数据库）：并发名额直接创建，aiomysql 查询替换为固定结果。
+    """
+    queries = []
+
+    async def fetch_all(kind, query, params, timer):
+        queries.append(kind)
+        return DATE_ROWS if kind == 'date' else AREA_ROWS
+
+    monkeypatch.setattr(asgi_app, 'fetch_all', fetch_all)
+    monkeypatch.setitem(asgi_app.api.memory_index_config, 'enabled', False)
+    monkeypatch.setattr(asgi_app, '_limits', {kind: asyncio.Semaphore(4) for kind in ('date', 'area')})
+    asgi_app.api.response_cache.invalidate()
+    client = TestClient(asgi_app.app)
+    client.queries = queries
+    return client
+
+
+def test_coordinates_fast_path(client):
+    response = client.get('/api/coordinates', params={'Date': '2023-05-01'}, headers={'Origin': 'http://example.com'})
+    assert response.status_code == 200
+    assert client.queries == ['date']
+    data = response.json()
+    assert [record['ID'] for record in data['all_polygons']] == [1, 2]
+    assert data['max_increase_record']['ID'] == 1
+    assert data['max_decrease_record']['ID'] == 2
+    assert response.headers['Vary'] == 'Accept'
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+
+    # 第二次命中响应缓存，If-None-Match 返回 304
+    again = client.get('/api/coordinates', params={'Date': '2023-05-01'},
+                       headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+    assert client.queries == ['date']
+
+
+def test_coordinates_in_area_fast_path(client):
+    response = client.get('/api/coordinates_in_area', params={'Area': '[[0, 0], [2, 0], [2, 2], [0, 2]]'})
+    assert response.status_code == 200
+    assert client.queries == ['area']
+    assert [record['ID'] for record in response.json()] == [1]
+    assert response.headers['Vary'] == 'Accept'
+
+
+def test_cors_preflight(client):
+    response = client.options('/api/coordinates', headers={
+        'Origin': 'http://example.com', 'Access-Control-Request-Method': 'GET'
+    })
+    assert response.status_code == 200
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+
+
+def test_forwarded_to_flask(client):
+    response = client.get('/api/cache_stats', headers={'Origin': 'http://example.com'})
+    assert response.status_code == 200
+    assert 'response_cache' in response.json()
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+    assert client.queries == []
+
+    # 参数不在快速路径范围内的请求同样交给 Flask，缺少 Date 时返回 Flask 的 400
+    response = client.get('/api/coordinates', params={'limit': '10'})
+    assert response.status_code == 400
+    assert response.headers['Vary'] == 'Accept'
+    assert client.queries == []
+
+
+def test_invalid_dates_rejected(client):
+    assert client.get('/api/coordinates', params={'Date': '2023-13-01'}).status_code == 400
+    assert client.get('/api/coordinates_in_area', params={
+        'Area': '[[0, 0], [2, 0], [2, 2], [0, 2]]', 'StartDate': 'yesterday'
+    }).status_code == 400
+    # 转交 Flask 的瓦片接口同样校验日期
+    assert client.get('/tiles/not-a-date/0/0/0.mvt').status_code == 400
+    assert client.queries == []
+
+
+@pytest.mark.parametrize('area', ['[[0, 0], [1, 0]]', '[[0, 0], [1, 1], [1, 0], [0, 1]]', 'not a list'])
+def test_invalid_area_rejected(client, area):
+    # 默认（快速路径）和分页（转交 Flask）两种路径都返回 400
+    assert client.get('/api/coordinates_in_area', params={'Area': area}).status_code == 400
+    assert client.get('/api/coordinates_in_area', params={'Area': area, 'limit': '10'}).status_code == 400
+    assert client.queries == []
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import shapely
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_format import decode_polygons, encode_polygons  # noqa: E402
+
+
+def make_rows(n):
+    rows = []
+    for i in range(n):
+        rows.append({
+            'ID': i + 1,
+            'Area': 100.0 * (i + 1),
+            'Trans': None if i == 0 else float(i),
+            'Ratios': None if i == 0 else 1.5,
+            'Center_WKT': None if i == 0 else f'POINT ({22.5 + i} {114.0 + i})'
+        })
+    geoms = np.array([shapely.box(22.5 + i, 114.0 + i, 22.6 + i, 114.1 + i) for i in range(n)], dtype=object)
+    return rows, geoms
+
+
+@pytest.mark.parametrize('n', [0, 1, 3])
+@pytest.mark.parametrize('coord_bytes', [4, 8])
+def test_round_trip(n, coord_bytes):
+    rows, geoms = make_rows(n)
+    data = b''.join(encode_polygons(rows, geoms, coord_bytes, max_index=None if n == 0 else 0, next_cursor=n or None))
+    assert len(data) % 8 == 0
+    decoded = decode_polygons(data)
+
+    assert decoded['ID'].tolist() == [row['ID'] for row in rows]
+    assert decoded['Area'].tolist() == [row['Area'] for row in rows]
+    assert np.array_equal(decoded['Change'], np.array([row['Trans'] for row in rows], dtype=float), equal_nan=True)
+    assert decoded['Center'].shape == (n, 2)
+    assert decoded['max_index'] == (None if n == 0 else 0)
+    assert decoded['min_index'] is None
+    assert decoded['next_cursor'] == (n or None)
+
+    offsets = decoded['ring_offsets']
+    assert len(offsets) == n + 1
+    for i, geom in enumerate(geoms):
+        ring = decoded['coords'][offsets[i]:offsets[i + 1]]
+        expected = shapely.get_coordinates(geom.exterior)
+        assert np.allclose(ring, expected, atol=1e-5 if coord_bytes == 4 else 0)
+
+
+def test_rejects_unknown_magic():
+    data = bytearray(b''.join(encode_polygons(*make_rows(1))))
+    data[:4] = b'XXXX'
+    with pytest.raises(ValueError):
+        decode_polygons(bytes(data))
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+import shapely
+
+try:
+    import mapbox_vector_tile
+except ImportError:  # 可选依赖，未安装时瓦片接口返回 501
+    mapbox_vector_tile = None
+
+# Web 墨卡托（EPSG:3857）半周长（米）
+ORIGIN_SHIFT = math.pi * 6378137.0
+# 墨卡托投影的纬度上限
+MAX_LATITUDE = 85.0511287798
+
+# MVT 瓦片参数
+TILE_EXTENT = 4096  # 瓦片内部坐标范围
+TILE_BUFFER = 64  # 裁剪时向外扩展的瓦片坐标单位，避免相邻瓦片接缝处出现描边
+LAYER_NAME = 'greenland'
+
+
+def tile_bounds_lonlat(z, x, y):
+    """
+    返回 XYZ 瓦片的经纬度范围 (min_lon, min_lat, max_lon, max_lat)。
+    """
+    n = 2 ** z
+    min_lon = x / n * 360.0 - 180.0
+    max_lon = (x + 1) / n * 360.0 - 180.0
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def tile_bounds_mercator(z, x, y):
+    """
+    返回 XYZ 瓦片的 EPSG:3857 范围 (minx, miny, maxx, maxy)。
+    """
+    size = 2 * ORIGIN_SHIFT / 2 ** z
+    minx = -ORIGIN_SHIFT + x * size
+    maxy = ORIGIN_SHIFT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def latlon_to_mercator(coords):
+    """
+    把表中 (纬度, 经度) 顺序的坐标数组整体转换为 EPSG:3857 的 (x, y)。
+    """
+    lat = np.clip(coords[:, 0], -MAX_LATITUDE, MAX_LATITUDE)
+    lon = coords[:, 1]
+    x = lon * ORIGIN_SHIFT / 180.0
+    y = np.log(np.tan(np.radians(90.0 + lat) / 2.0)) * ORIGIN_SHIFT / math.pi
+    return np.column_stack([x, y])
+
+
+def tiles_covering(bounds_lonlat, z):
+    """
+    返回覆盖经纬度范围的所有 z 级瓦片 (x, y)。
+    """
+    min_lon, min_lat, max_lon, max_lat = bounds_lonlat
+    n = 2 ** z
+
+    def tile_x(lon):
+        return min(max(int((lon + 180.0) / 360.0 * n), 0), n - 1)
+
+    def tile_y(lat):
+        lat = math.radians(min(max(lat, -MAX_LATITUDE), MAX_LATITUDE))
+        return min(max(int((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n), 0), n - 1)
+
+    for x in range(tile_x(min_lon), tile_x(max_lon) + 1):
+        for y in range(tile_y(max_lat), tile_y(min_lat) + 1):
+            yield x, y
+
+
+def _property(value):
+    # MVT 属性只支持基本类型，数据库的 Decimal 转为 float
+    return value if isinstance(value, (int, float, str)) else float(value)
+
+
+def render_tile(rows, geoms, z, x, y):
+    """
+    把某日期落在瓦片内的多边形裁剪、简化并编码为 Mapbox Vector Tile。
+
+    rows 需包含 ID、Area、Trans、Ratios 字段，geoms 为表中 (纬度, 经度) 顺序的几何数组。
+    """
+    bounds = tile_bounds_mercator(z, x, y)
+    pixel = (bounds[2] - bounds[0]) / TILE_EXTENT
+    buffer = TILE_BUFFER * pixel
+
+    features = []
+    if len(geoms):
+        # 整体投影到墨卡托，先按瓦片（含缓冲区）裁剪，再按半个瓦片像素简化
+        projected = shapely.transform(geoms, latlon_to_mercator)
+        clipped = shapely.clip_by_rect(
+            projected, bounds[0] - buffer, bounds[1] - buffer, bounds[2] + buffer, bounds[3] + buffer
+        )
+        clipped = shapely.simplify(clipped, pixel / 2, preserve_topology=True)
+        keep = ~shapely.is_empty(clipped)
+
+        for row, geom in zip((row for row, ok in zip(rows, keep) if ok), clipped[keep]):
+            properties = {'ID': row['ID']}
+            for field in ('Area', 'Trans', 'Ratios'):
+                if row.get(field) is not None:
+                    properties[field] = _property(row[field])
+            features.append({'geometry': geom, 'properties': properties})
+
+    return mapbox_vector_tile.encode(
+        [{'name': LAYER_NAME, 'features': features}],
+        default_options={'quantize_bounds': bounds, 'extents': TILE_EXTENT}
+    )